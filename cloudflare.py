@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+from functools import lru_cache
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from pacing import PACER
+
+load_dotenv()
+
+TEMPLATE_PATH = os.getenv('CLOUDFLARE_IMAGE_PATH') or 'CloudFlare.png'
+
+# Screenshots and the template are matched at this scale (0.5 = a quarter of the pixels)
+DETECTION_SCALE = float(os.getenv('CLOUDFLARE_DETECTION_SCALE', 0.5))
+
+# Extra pixels searched around the widget rectangle reported by the DOM
+REGION_PADDING = 40
+
+# Reports whether a Cloudflare challenge is on the page and, when the widget is
+# reachable from the DOM, its rectangle in screen coordinates. The Turnstile
+# iframe often sits in a closed shadow root, so the challenge page markers
+# (#challenge-stage, the "Just a moment" title) also count as a challenge.
+FIND_CHALLENGE_JS = """
+const widget = document.querySelector(
+    'iframe[src*="challenges.cloudflare.com"], .cf-turnstile, #turnstile-wrapper, #challenge-stage'
+);
+const present = !!widget || /just a moment/i.test(document.title);
+if (!present) {
+    return {present: false, rect: null};
+}
+let rect = null;
+if (widget) {
+    const r = widget.getBoundingClientRect();
+    if (r.width > 0 && r.height > 0) {
+        const ratio = window.devicePixelRatio || 1;
+        const left = window.screenX + (window.outerWidth - window.innerWidth) / 2;
+        const top = window.screenY + (window.outerHeight - window.innerHeight);
+        rect = {
+            x: Math.round((left + r.left) * ratio),
+            y: Math.round((top + r.top) * ratio),
+            width: Math.round(r.width * ratio),
+            height: Math.round(r.height * ratio)
+        };
+    }
+}
+return {present: true, rect: rect};
+"""
+
+def challenge_region(screen_width, screen_height):
+    """
+    Screen area to search when the DOM gives no widget rectangle, as (x, y, w, h).
+
+    CLOUDFLARE_REGION ("x,y,w,h") overrides the default, the central half of
+    the screen where the challenge page renders its checkbox.
+    """
+    region = os.getenv('CLOUDFLARE_REGION')
+    if region:
+        x, y, w, h = (int(v) for v in region.split(','))
+        return x, y, w, h
+    return screen_width // 4, screen_height // 4, screen_width // 2, screen_height // 2
+
+@lru_cache(maxsize=None)
+def load_template(path=TEMPLATE_PATH, scale=DETECTION_SCALE):
+    """Grayscale checkbox template, downscaled once and cached for the process."""
+    template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if template is None:
+        raise FileNotFoundError(f"Cloudflare template not found: {path}")
+    if scale != 1:
+        template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return template
+
+def _to_gray(image):
+    """PIL image, RGB(A) array or grayscale array -> grayscale uint8 array."""
+    array = np.asarray(image)
+    if array.ndim == 2:
+        return array
+    if array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+def locate_template(image, region=None, template_path=TEMPLATE_PATH, confidence=0.6, scale=DETECTION_SCALE):
+    """
+    Find the checkbox template inside `region` of a screenshot.
+
+    Args:
+        image: screenshot (PIL image or array) covering at least `region`
+        region (tuple): (x, y, w, h) to search, in image coordinates; None = whole image
+        template_path (str): template image (CloudFlare.png)
+        confidence (float): minimum normalised correlation score
+        scale (float): downscale factor applied to both region and template
+
+    Returns:
+        tuple: (x, y, w, h) of the match in image coordinates, or None
+    """
+    gray = _to_gray(image)
+    offset_x = offset_y = 0
+    if region is not None:
+        offset_x, offset_y = max(region[0], 0), max(region[1], 0)
+        gray = gray[offset_y:region[1] + region[3], offset_x:region[0] + region[2]]
+
+    if scale != 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    template = load_template(template_path, scale)
+    if gray.shape[0] < template.shape[0] or gray.shape[1] < template.shape[1]:
+        return None
+
+    scores = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+    _, best, _, (x, y) = cv2.minMaxLoc(scores)
+    if best < confidence:
+        return None
+
+    height, width = template.shape
+    return (
+        offset_x + round(x / scale),
+        offset_y + round(y / scale),
+        round(width / scale),
+        round(height / scale)
+    )
+
+def find_challenge(driver):
+    """
+    Ask the page whether a Cloudflare challenge is showing.
+
+    Returns:
+        dict: {"present": bool, "rect": (x, y, w, h) in screen coordinates or None}
+    """
+    try:
+        result = driver.execute_script(FIND_CHALLENGE_JS) or {}
+    except Exception:
+        # The challenge page can replace the document mid-call; look again next poll
+        return {'present': True, 'rect': None}
+    rect = result.get('rect')
+    return {
+        'present': bool(result.get('present')),
+        'rect': (rect['x'], rect['y'], rect['width'], rect['height']) if rect else None
+    }
+
+def _search_region(rect, screen_width, screen_height):
+    if rect is None:
+        return challenge_region(screen_width, screen_height)
+    # Padded widget rectangle, clipped to the screen on every side
+    x = max(rect[0] - REGION_PADDING, 0)
+    y = max(rect[1] - REGION_PADDING, 0)
+    right = min(rect[0] + rect[2] + REGION_PADDING, screen_width)
+    bottom = min(rect[1] + rect[3] + REGION_PADDING, screen_height)
+    return x, y, right - x, bottom - y
+
+def solve_cloudflare_challenge(driver=None, template_path=None, confidence=0.6, timeout=45, max_clicks=2):
+    """
+    Click through a Cloudflare checkbox challenge if one is showing.
+
+    With a driver, the DOM is checked first and the function returns at once
+    when there is no challenge, or as soon as it clears. Otherwise (or when the
+    widget is hidden from the DOM) a screenshot of only the challenge region is
+    matched against the cached, downscaled template.
+
+    Args:
+        driver: Selenium driver on the page to check (None = screenshot polling only)
+        template_path (str): checkbox template (CLOUDFLARE_IMAGE_PATH / CloudFlare.png)
+        confidence (float): minimum template match score
+        timeout (float): give up after this many seconds
+        max_clicks (int): clicks allowed before giving up
+
+    Returns:
+        bool: True when no challenge is (or remains) on screen
+    """
+    template_path = template_path or TEMPLATE_PATH
+    deadline = time.monotonic() + timeout
+    clicks_done = 0
+
+    if driver is not None:
+        challenge = find_challenge(driver)
+        if not challenge['present']:
+            return True
+        print(" 🛡️ Cloudflare challenge detected")
+
+    # Imported lazily so it binds to the virtual display when one is used
+    import pyautogui
+    screen_width, screen_height = pyautogui.size()
+
+    while time.monotonic() < deadline and clicks_done < max_clicks:
+        rect = challenge['rect'] if driver is not None else None
+        region = _search_region(rect, screen_width, screen_height)
+        try:
+            location = locate_template(pyautogui.screenshot(region=region), None, template_path, confidence)
+        except Exception as e:
+            print(f" ⚠️ Error during Cloudflare screenshot match: {e}")
+            location = None
+
+        if location:
+            x, y, w, h = location
+            pyautogui.moveTo(region[0] + x + w // 2, region[1] + y + h // 2, duration=0.3)
+            pyautogui.click()
+            clicks_done += 1
+            print(f" ✅ Clicked Cloudflare checkbox {clicks_done}/{max_clicks}")
+
+        if driver is not None:
+            # Return as soon as the page no longer shows the challenge
+            wait = min(10 if location else 1, max(deadline - time.monotonic(), 0.1))
+            if PACER.wait_until(driver, lambda d: not find_challenge(d)['present'],
+                                timeout=wait, category="cloudflare"):
+                print(" ✅ Cloudflare challenge cleared")
+                return True
+            challenge = find_challenge(driver)
+        else:
+            if location is None and clicks_done > 0:
+                print(" ✅ Cloudflare checkbox disappeared after clicks")
+                return True
+            time.sleep(1)
+
+    if driver is None and clicks_done == 0:
+        # Nothing to click within the timeout: no challenge on screen
+        return True
+    print(f" ⚠️ Cloudflare challenge still showing after {clicks_done} click(s)")
+    return False
+
+def benchmark(paths, template_path=TEMPLATE_PATH, confidence=0.6):
+    """
+    Compare full-screen matching (what pyautogui.locateOnScreen does) with the
+    region-limited, downscaled match over saved screenshots (see
+    tests/fixtures/cloudflare for a set with known checkbox positions).
+
+    Returns:
+        dict: per-method total milliseconds and number of screenshots matched
+    """
+    import pyscreeze
+    from PIL import Image
+
+    load_template(template_path)
+    results = {'full_screen': {'ms': 0.0, 'found': 0}, 'region': {'ms': 0.0, 'found': 0}}
+    for path in paths:
+        image = Image.open(path).convert('RGB')
+        region = challenge_region(*image.size)
+
+        started = time.perf_counter()
+        try:
+            found = pyscreeze.locate(template_path, image, confidence=confidence)
+        except pyscreeze.ImageNotFoundException:
+            # Newer pyscreeze raises instead of returning None
+            found = None
+        results['full_screen']['ms'] += (time.perf_counter() - started) * 1000
+        results['full_screen']['found'] += found is not None
+
+        started = time.perf_counter()
+        found = locate_template(image, region, template_path, confidence)
+        results['region']['ms'] += (time.perf_counter() - started) * 1000
+        results['region']['found'] += found is not None
+    return results
+
+if __name__ == "__main__":
+    # Benchmark against saved screenshots:
+    #   python cloudflare.py shot1.png [shot2.png ...]
+    paths = sys.argv[1:]
+    results = benchmark(paths)
+    for method, stats in results.items():
+        print(f"{method:>11}: {stats['ms']:.1f} ms total, {stats['ms'] / max(len(paths), 1):.2f} ms/screenshot, "
+              f"found in {stats['found']}/{len(paths)}")
@@ -1,14 +1,51 @@
 import psycopg2
+import io
 import os
 import json
+import socket
+import threading
 import pandas as pd
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from job_parsing import jobs_to_json, canonical_job_link
+from db_writer import WRITER_QUEUE_SIZE
 
 load_dotenv()
 
-def get_db_connection():
-    return psycopg2.connect(
+_connection_pool = None
+_promotion_watermark_ready = False
+_practice_lease_ready = False
+_typed_money_columns_ready = False
+_practice_fingerprint_ready = False
+_lead_link_index_ready = False
+_link_cache = None
+_job_query_table_ready = False
+_content_hash_ready = False
+_seen_jobs = None
+_transaction_hooks = {}
+
+# Seconds a claimed practice row stays leased without a heartbeat
+PRACTICE_LEASE_SECONDS = int(os.getenv('PRACTICE_LEASE_SECONDS', 600))
+
+# Batches at or above this many rows are loaded with COPY instead of execute_values
+BULK_COPY_THRESHOLD = int(os.getenv('DB_COPY_THRESHOLD', 1000))
+BULK_PAGE_SIZE = int(os.getenv('DB_BULK_PAGE_SIZE', 500))
+
+# Canonical links of stored leads kept in memory to skip known jobs before staging
+LINK_CACHE_SIZE = int(os.getenv('LINK_CACHE_SIZE', 50000))
+
+# Days of (job, search query) associations the seen-job index is warmed with (0 = this batch only)
+SEEN_JOB_DAYS = int(os.getenv('SEEN_JOB_DAYS', 3))
+
+# Longest a schema change waits for a table lock before giving up
+DDL_LOCK_TIMEOUT = os.getenv('DDL_LOCK_TIMEOUT', '10s')
+
+def _connection_params():
+    return dict(
         dbname=os.getenv('DB_NAME'),
         user=os.getenv('DB_USER'),
         password=os.getenv('DB_PASSWORD'),
@@ -16,340 +53,1044 @@ def get_db_connection():
         port=os.getenv('DB_PORT')
     )
 
-def get_search_queries_from_db():
-    conn = get_db_connection()
-    cur = conn.cursor()
+def get_db_connection():
+    """Open a standalone (non-pooled) connection. Prefer db_connection()."""
+    return psycopg2.connect(**_connection_params())
+
+def default_pool_size():
+    """
+    Connections worker mode can hold at once; getconn() raises PoolError
+    instead of waiting, so the pool must cover all of them:
+    the main thread, the writer's transaction plus one nested connection
+    opened inside it (LinkCache.refresh), and one lease heartbeat per row
+    that is queued for, being written by or being scraped ahead of the writer.
+    """
+    heartbeats = WRITER_QUEUE_SIZE + 2
+    return 1 + 2 + heartbeats
+
+def get_connection_pool(min_size=None, max_size=None):
+    """
+    Return the shared connection pool, creating it on first use.
+
+    Sizes default to DB_POOL_MIN / DB_POOL_MAX from the environment
+    (1 / default_pool_size()).
+    """
+    global _connection_pool
+    if _connection_pool is None or _connection_pool.closed:
+        min_size = min_size if min_size is not None else int(os.getenv('DB_POOL_MIN', 1))
+        max_size = max_size if max_size is not None else int(os.getenv('DB_POOL_MAX', default_pool_size()))
+        _connection_pool = ThreadedConnectionPool(min_size, max_size, **_connection_params())
+    return _connection_pool
+
+def close_connection_pool():
+    """Close every pooled connection (call once at process shutdown)."""
+    global _connection_pool
+    if _connection_pool is not None and not _connection_pool.closed:
+        _connection_pool.closeall()
+    _connection_pool = None
+
+@contextmanager
+def db_connection(conn=None):
+    """
+    Yield a database connection.
+
+    If `conn` is given it is yielded as-is and the caller keeps ownership of
+    the transaction (no commit, rollback or close happens here). Otherwise a
+    connection is borrowed from the pool, committed on success, rolled back
+    on error and returned to the pool.
+
+    Args:
+        conn: Optional existing connection to reuse for a whole run
+
+    Example:
+        with db_connection() as conn:
+            raw_id = insert_raw_json_data(raw_json, conn=conn, job_id=job_id)
+            insert_df_into_staging_lead(df, conn=conn, raw_id=raw_id)
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    pool = get_connection_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        for on_commit, on_rollback in _transaction_hooks.pop(id(conn), []):
+            if on_rollback is not None:
+                on_rollback()
+        raise
+    else:
+        for on_commit, on_rollback in _transaction_hooks.pop(id(conn), []):
+            on_commit()
+    finally:
+        _transaction_hooks.pop(id(conn), None)
+        pool.putconn(conn, close=bool(conn.closed))
+
+def after_commit(conn, on_commit, on_rollback=None):
+    """
+    Run `on_commit()` once the transaction on `conn` commits, or
+    `on_rollback()` if it rolls back instead. The hooks run where the
+    connection was borrowed from the pool (the outermost db_connection), so
+    nested helpers can defer in-memory updates until their data is durable.
+    """
+    _transaction_hooks.setdefault(id(conn), []).append((on_commit, on_rollback))
+
+@contextmanager
+def schema_cursor():
+    """
+    Yield a cursor for one-off schema changes (the ensure_* helpers).
+
+    It runs on its own pooled connection and commits on exit, never inside a
+    caller's transaction, so a rolled-back run cannot undo DDL that the
+    ensure_* flags already count as done. The lock timeout turns a wait on a
+    table held by another open transaction into an error instead of a hang.
+    """
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute("SET LOCAL lock_timeout = %s", (DDL_LOCK_TIMEOUT,))
+        yield cur
+
+def _missing_columns(cur, schema, table, columns):
+    """Columns of `columns` that schema.table does not have yet."""
     cur.execute('''
-        SELECT "id", "search_criteria"
-        FROM "published"."practice"
-        WHERE "status" = 0
-        ORDER BY "id" ASC
-        LIMIT 1
-    ''')
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+        SELECT "column_name"
+        FROM information_schema.columns
+        WHERE "table_schema" = %s AND "table_name" = %s
+    ''', (schema, table))
+    existing = {row[0] for row in cur.fetchall()}
+    return [column for column in columns if column not in existing]
+
+def _relation_exists(cur, schema, name):
+    # Checked before CREATE INDEX IF NOT EXISTS, which locks the table even when the index exists
+    cur.execute('SELECT to_regclass(%s) IS NOT NULL', (f'"{schema}"."{name}"',))
+    return cur.fetchone()[0]
+
+def _to_db_value(value):
+    """Map pandas missing values (NaN/NaT) to None so they load as NULL."""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+def _df_column(df, column, default=None):
+    """Return a DataFrame column as a list, or `default` for every row if it is missing."""
+    if column in df.columns:
+        return [_to_db_value(v) for v in df[column].tolist()]
+    return [default] * len(df)
+
+def _copy_field(value):
+    # CSV COPY: an unquoted empty field is NULL, a quoted one is an empty string
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+def bulk_insert(cur, table, columns, rows, strategy=None, returning=None, on_conflict=None):
+    """
+    Write many rows into `table` in one batched round-trip.
+
+    Args:
+        cur: Open cursor
+        table (str): Target table, e.g. 'staging.lead'
+        columns (list): Column names (quote reserved words, e.g. '"desc"')
+        rows (list): Row tuples in `columns` order
+        strategy (str): 'values' (execute_values), 'copy' (COPY FROM STDIN)
+                        or None to pick COPY for batches >= BULK_COPY_THRESHOLD
+        returning (str): Optional RETURNING expression, e.g. 'lead_id'.
+                         COPY cannot return rows, so this forces 'values'.
+        on_conflict (str): Optional conflict clause, e.g. 'ON CONFLICT DO NOTHING'.
+                           COPY has none, so this forces 'values' too.
+
+    Returns:
+        int: Number of rows written, or the list of returned values (in row
+             order; tuples when RETURNING has several columns) when
+             `returning` is given
+    """
+    if not rows:
+        return [] if returning else 0
+
+    if returning or on_conflict:
+        strategy = 'values'
+    elif strategy is None:
+        strategy = 'copy' if len(rows) >= BULK_COPY_THRESHOLD else 'values'
+
+    column_list = ', '.join(columns)
+
+    if strategy == 'copy':
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(','.join(_copy_field(v) for v in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        cur.copy_expert(f'COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+    elif strategy == 'values':
+        query = f'INSERT INTO {table} ({column_list}) VALUES %s'
+        if on_conflict:
+            query += f' {on_conflict}'
+        if returning:
+            query += f' RETURNING {returning}'
+        result = execute_values(
+            cur,
+            query,
+            rows,
+            page_size=BULK_PAGE_SIZE,
+            fetch=bool(returning)
+        )
+        if returning:
+            return [r[0] if len(r) == 1 else tuple(r) for r in result]
+    else:
+        raise ValueError(f"Unknown bulk insert strategy: {strategy}")
+
+    return len(rows)
+
+def get_search_queries_from_db(conn=None, exclude_ids=None):
+    """
+    Oldest pending practice row, skipping `exclude_ids` (rows a batch has
+    already handed to its DB writer but whose status is not updated yet).
+    """
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            SELECT "id", "search_criteria"
+            FROM "published"."practice"
+            WHERE "status" = 0
+              AND NOT ("id" = ANY(%s))
+            ORDER BY "id" ASC
+            LIMIT 1
+        ''', (list(exclude_ids or []),))
+        row = cur.fetchone()
     if row:
         return {"id": row[0], "search_criteria": row[1]}
     return None
 
-def read_last_scrape_time(query):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('''
-        SELECT "search_criteria_time"
-        FROM "published"."practice"
-        WHERE LOWER("search_criteria") = LOWER(%s)
-        LIMIT 1
-    ''', (query,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+def read_last_scrape_time(query, conn=None):
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            SELECT "search_criteria_time"
+            FROM "published"."practice"
+            WHERE LOWER("search_criteria") = LOWER(%s)
+            LIMIT 1
+        ''', (query,))
+        row = cur.fetchone()
     if row and row[0]:
         return row[0]
     return None
 
-def update_scrape_time(query):
-    current_time = datetime.now() - timedelta(minutes=2)
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('''
-        UPDATE "published"."practice"
-        SET "search_criteria_time" = %s
-        WHERE LOWER("search_criteria") = LOWER(%s)
-    ''', (current_time, query))
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def get_source_info():
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('''
-        SELECT source_id, source_name
-        FROM published.source
-        WHERE source_id = 1
-        LIMIT 1
-    ''')
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+def update_scrape_time(query, conn=None, fingerprint=None, scraped_at=None):
+    """
+    Advance a query's last scrape time; with `fingerprint`, also store the
+    top-cards fingerprint the next run compares against (see read_results_fingerprint).
+
+    `scraped_at` is when the first results page was requested (now when
+    omitted). Jobs posted while the later pages were crawled are newer than
+    the mark, so the next run still picks them up. Call this in the same
+    transaction as the run's data, so a failed write leaves the mark alone.
+    """
+    current_time = (scraped_at or datetime.now()) - timedelta(minutes=2)
+    if fingerprint is not None:
+        ensure_practice_fingerprint_column()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        if fingerprint is None:
+            cur.execute('''
+                UPDATE "published"."practice"
+                SET "search_criteria_time" = %s
+                WHERE LOWER("search_criteria") = LOWER(%s)
+            ''', (current_time, query))
+        else:
+            cur.execute('''
+                UPDATE "published"."practice"
+                SET "search_criteria_time" = %s,
+                    "results_fingerprint" = %s
+                WHERE LOWER("search_criteria") = LOWER(%s)
+            ''', (current_time, fingerprint, query))
+
+def ensure_practice_fingerprint_column():
+    """Add the results_fingerprint column used by the "nothing new" check to published.practice."""
+    global _practice_fingerprint_ready
+    if _practice_fingerprint_ready:
+        return
+    with schema_cursor() as cur:
+        if _missing_columns(cur, 'published', 'practice', ['results_fingerprint']):
+            cur.execute('''
+                ALTER TABLE "published"."practice"
+                    ADD COLUMN IF NOT EXISTS "results_fingerprint" text
+            ''')
+    _practice_fingerprint_ready = True
+
+def read_results_fingerprint(query, conn=None):
+    """Top-cards fingerprint stored by the previous run of a query (None if there is none)."""
+    ensure_practice_fingerprint_column()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            SELECT "results_fingerprint"
+            FROM "published"."practice"
+            WHERE LOWER("search_criteria") = LOWER(%s)
+            LIMIT 1
+        ''', (query,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+def get_source_info(conn=None):
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            SELECT source_id, source_name
+            FROM published.source
+            WHERE source_id = 1
+            LIMIT 1
+        ''')
+        row = cur.fetchone()
     return {"source_id": row[0], "source_name": row[1]} if row else None
 
 
-def insert_jobs_into_public_job(df, source_info, search_criteria):
+def insert_jobs_into_public_job(df, source_info, search_criteria, conn=None):
+    """
+    Insert one run record into public.job.
+
+    Returns:
+        int: the new public.job id (pass it to insert_raw_json_data), or None without
+             source info; database errors are raised
+    """
     if source_info is None:
         print("No source info found")
-        return
+        return None
 
     source_id = source_info["source_id"]
     source_name = source_info["source_name"]
 
     print("Inserting 1 job run record into public.job...")
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    try:
+    # Errors propagate: swallowing one would leave a shared transaction aborted
+    # and surface later as an unrelated InFailedSqlTransaction
+    with db_connection(conn) as conn, conn.cursor() as cur:
         cur.execute('''
             INSERT INTO public.job (job, source_id, params)
             VALUES (%s, %s, %s)
+            RETURNING id
         ''', (source_name, source_id, search_criteria))
+        job_id = cur.fetchone()[0]
 
-        print(f"Inserted job run for source '{source_name}' and search '{search_criteria}'")
-    except Exception as e:
-        print(f"Error inserting job run record: {str(e)}")
-    finally:
-        conn.commit()
-        cur.close()
-        conn.close()
+        print(f"Inserted job run {job_id} for source '{source_name}' and search '{search_criteria}'")
+    return job_id
 
-def insert_raw_json_data(raw_json_data):
+def insert_raw_json_data(raw_json_data, conn=None, job_id=None):
+    """
+    Store one batch of jobs in raw.UpworkDataJson under its public.job run.
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Get the maximum ID from public.job table
-    cur.execute('''
-        SELECT MAX(id) FROM public.job
-    ''')
-    
-    result = cur.fetchone()
-    if result and result[0] is not None:
-        job_id = result[0]
-        print(f"Retrieved latest job_id from public.job: {job_id}")
-    else:
-        print("No records found in public.job table")
-        cur.close()
-        conn.close()
+    Args:
+        raw_json_data (str or list): JSON string, or JobRecords serialised here
+        conn: Optional existing connection (see db_connection)
+        job_id (int): public.job id returned by insert_jobs_into_public_job
+
+    Returns:
+        int: the new RawId (pass it to insert_df_into_staging), or None when no run was given
+    """
+    if job_id is None:
+        print("No public.job run record given, raw JSON not stored")
         return None
-    
-    # Insert raw JSON data into raw.UpworkDataJson
-    cur.execute('''
-        INSERT INTO raw."UpworkDataJson" ("JobId", "RawJson")
-        VALUES (%s, %s)
-    ''', (job_id, raw_json_data))
-    
-    print(f"Inserted raw JSON data into raw.UpworkDataJson for job_id: {job_id}")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    return job_id
 
-def get_max_lead_id():
+    # Raw storage is the one place job records become JSON
+    if not isinstance(raw_json_data, str):
+        raw_json_data = jobs_to_json(raw_json_data)
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            INSERT INTO raw."UpworkDataJson" ("JobId", "RawJson")
+            VALUES (%s, %s)
+            RETURNING "RawId"
+        ''', (job_id, raw_json_data))
+        raw_id = cur.fetchone()[0]
+
+        print(f"Inserted raw JSON data into raw.UpworkDataJson (RawId {raw_id}) for job_id: {job_id}")
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
+    return raw_id
+
+def ensure_typed_money_columns():
+    """
+    Add the typed money columns (see normalize_money_columns) to the staging
+    and published lead/client tables, plus indexes for range filters such as
+    "hourly >= $50 and client spent >= $10K" on published.
+    """
+    global _typed_money_columns_ready
+    if _typed_money_columns_ready:
+        return
+    with schema_cursor() as cur:
+        for schema in ('staging', 'published'):
+            if _missing_columns(cur, schema, 'lead', ['hour_rate_low_usd', 'hour_rate_high_usd', 'fix_price_usd']):
+                cur.execute(f'''
+                    ALTER TABLE "{schema}"."lead"
+                        ADD COLUMN IF NOT EXISTS "hour_rate_low_usd" numeric(12, 2),
+                        ADD COLUMN IF NOT EXISTS "hour_rate_high_usd" numeric(12, 2),
+                        ADD COLUMN IF NOT EXISTS "fix_price_usd" numeric(12, 2)
+                ''')
+            if _missing_columns(cur, schema, 'client', ['client_spent_usd', 'payment_verified']):
+                cur.execute(f'''
+                    ALTER TABLE "{schema}"."client"
+                        ADD COLUMN IF NOT EXISTS "client_spent_usd" numeric(14, 2),
+                        ADD COLUMN IF NOT EXISTS "payment_verified" boolean
+                ''')
+        for table, index, column in (
+            ('lead', 'lead_hour_rate_low_usd_idx', 'hour_rate_low_usd'),
+            ('lead', 'lead_fix_price_usd_idx', 'fix_price_usd'),
+            ('client', 'client_spent_usd_idx', 'client_spent_usd'),
+        ):
+            if not _relation_exists(cur, 'published', index):
+                cur.execute(f'''
+                    CREATE INDEX IF NOT EXISTS "{index}"
+                        ON "published"."{table}" ("{column}")
+                ''')
+    _typed_money_columns_ready = True
+
+def _ensure_lead_link_lookup_index(cur, schema):
+    """Non-unique canonical-link index for a table whose unique one is partial."""
     cur.execute('''
-        SELECT MAX(lead_id) FROM staging.lead
-    ''')
-    
-    result = cur.fetchone()
-    if result and result[0] is not None:
-        max_lead_id = result[0]
-        print(f"Retrieved maximum lead_id from staging.lead: {max_lead_id}")
-        cur.close()
-        conn.close()
-        return max_lead_id
+        SELECT I."indpred" IS NOT NULL
+        FROM pg_index I
+        WHERE I."indexrelid" = to_regclass(%s)
+    ''', (f'"{schema}"."lead_job_link_key"',))
+    row = cur.fetchone()
+    if row and row[0] and not _relation_exists(cur, schema, 'lead_job_link_idx'):
+        cur.execute(f'''
+            CREATE INDEX IF NOT EXISTS "lead_job_link_idx"
+                ON "{schema}"."lead" (("published"."canonical_job_link"("link")))
+        ''')
+
+def ensure_lead_link_unique_indexes():
+    """
+    Unique indexes on the canonical link of staging.lead and published.lead,
+    so lead inserts can use ON CONFLICT DO NOTHING.
+
+    The canonical link is computed by published.canonical_job_link(link),
+    the SQL twin of job_parsing.canonical_job_link: the Upwork job id URL
+    when the link has one (".../jobs/Slug_~02.../" and ".../jobs/~02..."
+    are the same job), else the link without its query string. The older
+    split_part index is replaced.
+
+    Tables that already hold duplicate links get a partial index covering
+    only rows added from now on (lead_id above the current maximum); the
+    legacy duplicates are left untouched, and a plain index on the same
+    expression serves link lookups across all rows.
+    """
+    global _lead_link_index_ready
+    if _lead_link_index_ready:
+        return
+    with schema_cursor() as cur:
+        # OR REPLACE: workers starting together must not race on a check-then-create
+        cur.execute('''
+            CREATE OR REPLACE FUNCTION "published"."canonical_job_link"(link text) RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE
+            AS $$
+                SELECT COALESCE(
+                    'https://www.upwork.com/jobs/' || substring(lower(link) from '~0[0-9a-z]+'),
+                    split_part(link, '?', 1)
+                )
+            $$
+        ''')
+        for schema in ('staging', 'published'):
+            if _relation_exists(cur, schema, 'lead_job_link_key'):
+                _ensure_lead_link_lookup_index(cur, schema)
+                continue
+            cur.execute('SAVEPOINT lead_link_index')
+            try:
+                cur.execute(f'''
+                    CREATE UNIQUE INDEX IF NOT EXISTS "lead_job_link_key"
+                        ON "{schema}"."lead" (("published"."canonical_job_link"("link")))
+                ''')
+            except psycopg2.errors.UniqueViolation:
+                cur.execute('ROLLBACK TO SAVEPOINT lead_link_index')
+                cur.execute(f'SELECT COALESCE(MAX("lead_id"), 0) FROM "{schema}"."lead"')
+                max_lead_id = cur.fetchone()[0]
+                cur.execute(f'''
+                    CREATE UNIQUE INDEX IF NOT EXISTS "lead_job_link_key"
+                        ON "{schema}"."lead" (("published"."canonical_job_link"("link")))
+                        WHERE "lead_id" > {int(max_lead_id)}
+                ''')
+                print(f"⚠️ {schema}.lead has duplicate links; unique index covers lead_id > {max_lead_id} only")
+                _ensure_lead_link_lookup_index(cur, schema)
+            cur.execute('RELEASE SAVEPOINT lead_link_index')
+            cur.execute(f'DROP INDEX IF EXISTS "{schema}"."lead_canonical_link_key"')
+    _lead_link_index_ready = True
+
+def ensure_content_hash_columns():
+    """
+    Add content_hash (see job_parsing.content_hash) to staging.lead and
+    published.lead, and create published.lead_history: one row per detected
+    edit with the old and new hash and the previous values of the changed
+    fields only.
+    """
+    global _content_hash_ready
+    if _content_hash_ready:
+        return
+    with schema_cursor() as cur:
+        for schema in ('staging', 'published'):
+            if _missing_columns(cur, schema, 'lead', ['content_hash']):
+                cur.execute(f'''
+                    ALTER TABLE "{schema}"."lead"
+                        ADD COLUMN IF NOT EXISTS "content_hash" text
+                ''')
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS "published"."lead_history" (
+                "history_id" bigserial PRIMARY KEY,
+                "lead_id" integer NOT NULL,
+                "changed_at" timestamp NOT NULL DEFAULT now(),
+                "old_hash" text,
+                "new_hash" text NOT NULL,
+                "changes" jsonb NOT NULL
+            )
+        ''')
+        if not _relation_exists(cur, 'published', 'lead_history_lead_id_idx'):
+            cur.execute('''
+                CREATE INDEX IF NOT EXISTS "lead_history_lead_id_idx"
+                    ON "published"."lead_history" ("lead_id")
+            ''')
+    _content_hash_ready = True
+
+class LinkCache:
+    """
+    LRU map of canonical links already stored in published.lead to their
+    content_hash (None for leads stored before hashes existed).
+
+    refresh() pulls only leads added since the previous refresh (by lead_id),
+    on its own pooled connection so it never sees a caller's uncommitted
+    rows. Correctness does not depend on the cache: links it has evicted or
+    not seen yet are still stopped by the unique index, and a hash it holds
+    that is out of date only costs a no-op check in update_changed_leads.
+    """
+
+    def __init__(self, max_size=LINK_CACHE_SIZE):
+        self.max_size = max_size
+        self.links = OrderedDict()
+        self.last_lead_id = None
+        self.hits = 0
+
+    def add(self, link, content_hash=None):
+        self.links[link] = content_hash
+        self.links.move_to_end(link)
+        if len(self.links) > self.max_size:
+            self.links.popitem(last=False)
+
+    def get(self, link):
+        """Stored content_hash of a cached link (None when unknown)."""
+        return self.links.get(link)
+
+    def __contains__(self, link):
+        if link in self.links:
+            self.links.move_to_end(link)
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.links)
+
+    def refresh(self):
+        """Load published leads newer than the last refresh (the most recent max_size on the first call)."""
+        ensure_content_hash_columns()
+        with db_connection() as conn, conn.cursor() as cur:
+            if self.last_lead_id is None:
+                cur.execute('''
+                    SELECT "lead_id", "published"."canonical_job_link"("link"), "content_hash"
+                    FROM "published"."lead"
+                    ORDER BY "lead_id" DESC
+                    LIMIT %s
+                ''', (self.max_size,))
+                rows = cur.fetchall()[::-1]
+            else:
+                cur.execute('''
+                    SELECT "lead_id", "published"."canonical_job_link"("link"), "content_hash"
+                    FROM "published"."lead"
+                    WHERE "lead_id" > %s
+                    ORDER BY "lead_id"
+                ''', (self.last_lead_id,))
+                rows = cur.fetchall()
+        for lead_id, link, content_hash in rows:
+            self.add(link, content_hash)
+        if rows:
+            self.last_lead_id = rows[-1][0]
+        elif self.last_lead_id is None:
+            self.last_lead_id = 0
+        return len(rows)
+
+def get_link_cache():
+    """The process-wide LinkCache, warmed from published.lead and refreshed on every call."""
+    global _link_cache
+    if _link_cache is None:
+        _link_cache = LinkCache()
+        print(f"🧠 Warmed link cache with {_link_cache.refresh()} published links")
     else:
-        print("No records found in staging.lead table, returning 0")
-        cur.close()
-        conn.close()
+        _link_cache.refresh()
+    return _link_cache
+
+def ensure_job_query_table():
+    """
+    published.job_query: which search queries returned each captured job,
+    keyed by the Upwork job id ("~02...") of its link.
+    """
+    global _job_query_table_ready
+    if _job_query_table_ready:
+        return
+    with schema_cursor() as cur:
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS "published"."job_query" (
+                "job_key" text NOT NULL,
+                "search_criteria" text NOT NULL,
+                "link" text,
+                "first_seen_at" timestamp NOT NULL DEFAULT now(),
+                PRIMARY KEY ("job_key", "search_criteria")
+            )
+        ''')
+        if not _relation_exists(cur, 'published', 'job_query_first_seen_at_idx'):
+            cur.execute('''
+                CREATE INDEX IF NOT EXISTS "job_query_first_seen_at_idx"
+                    ON "published"."job_query" ("first_seen_at")
+            ''')
+    _job_query_table_ready = True
+
+def record_job_queries(rows, conn=None):
+    """
+    Record (job_key, search_criteria, link) associations; pairs already
+    stored are skipped.
+
+    Returns:
+        int: Number of new associations
+    """
+    rows = [row for row in rows if row[0]]
+    if not rows:
         return 0
+    ensure_job_query_table()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        inserted = bulk_insert(
+            cur, 'published.job_query', ['"job_key"', '"search_criteria"', '"link"'],
+            list(dict.fromkeys(rows)), returning='job_key',
+            on_conflict='ON CONFLICT ("job_key", "search_criteria") DO NOTHING'
+        )
+    return len(inserted)
+
+class SeenJobIndex:
+    """
+    Upwork job ids already captured, with their content_hash, so a card
+    returned by another search query is not stored again. Only its
+    (job, query) association is queued (associate), plus the card itself
+    when its hash differs from the stored one (an edited posting, applied
+    by update_changed_leads). Both are written with the next persisted
+    batch (drain).
+
+    Scoped to one batch: warmed from the last SEEN_JOB_DAYS of
+    published.job_query, then grown as this batch's writes land. The
+    scraper and the DB writer thread share it, hence the lock.
+    """
+
+    def __init__(self):
+        self.keys = {}
+        self.pending = []
+        self.edits = []
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def warm(self, days=SEEN_JOB_DAYS, conn=None):
+        """Load job ids (and their stored hash) associated with any query in the last `days` days."""
+        if days <= 0:
+            return 0
+        ensure_job_query_table()
+        ensure_content_hash_columns()
+        with db_connection(conn) as conn, conn.cursor() as cur:
+            cur.execute('''
+                SELECT DISTINCT ON (JQ."job_key") JQ."job_key", DL."content_hash"
+                FROM "published"."job_query" JQ
+                LEFT JOIN "published"."lead" DL ON "published"."canonical_job_link"(DL."link") = "published"."canonical_job_link"(JQ."link")
+                WHERE JQ."first_seen_at" > now() - make_interval(days => %s)
+                ORDER BY JQ."job_key", DL."lead_id" DESC
+            ''', (days,))
+            rows = cur.fetchall()
+        self.add(dict(rows))
+        return len(rows)
 
-def insert_df_into_staging_lead(df):
+    def add(self, hashes):
+        """Record captured jobs: job key -> content_hash (None when unknown)."""
+        with self._lock:
+            self.keys.update((key, value) for key, value in hashes.items() if key)
+
+    def __contains__(self, key):
+        return key is not None and key in self.keys
+
+    def is_edited(self, key, content_hash):
+        """True when `content_hash` differs from the stored one (or none is stored)."""
+        return self.keys.get(key) != content_hash
+
+    def snapshot(self):
+        """Copy of the captured job ids, safe to hand to the browser."""
+        with self._lock:
+            return list(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def associate(self, key, search_criteria, link=None, edit=None):
+        """
+        Queue the association of an already captured job with another query,
+        and `edit` (its JobRecord) when the posting changed.
+        """
+        with self._lock:
+            self.pending.append((key, search_criteria, canonical_job_link(link) if link else None))
+            if edit is not None:
+                self.edits.append(edit)
+            self.skipped += 1
+
+    def drain(self):
+        """Take every queued association and edited job."""
+        with self._lock:
+            pending, self.pending = self.pending, []
+            edits, self.edits = self.edits, []
+        return pending, edits
+
+    def requeue(self, rows, edits=()):
+        """Put back associations and edits whose write failed."""
+        with self._lock:
+            self.pending[:0] = rows
+            self.edits[:0] = edits
+
+def get_seen_jobs(reset=False):
+    """The batch's SeenJobIndex, created (and warmed) on first use or when `reset`."""
+    global _seen_jobs
+    if _seen_jobs is None or reset:
+        _seen_jobs = SeenJobIndex()
+        if SEEN_JOB_DAYS > 0:
+            print(f"👀 Warmed seen-job index with {_seen_jobs.warm()} captured jobs")
+    return _seen_jobs
+
+def insert_df_into_staging_lead(df, conn=None, raw_id=None):
+    """
+    Insert DataFrame rows into staging.lead under their raw.UpworkDataJson row
+
+    Args:
+        df: DataFrame of scraped jobs
+        conn: Optional existing connection (see db_connection)
+        raw_id: RawId returned by insert_raw_json_data for this batch
+
+    Returns:
+        list: Generated staging lead_ids, one per df row in row order, with
+              None for rows whose link is already in staging.lead
+              (empty if nothing was inserted)
+    """
 
     if df.empty:
         print("DataFrame is empty, nothing to insert")
-        return None
-        
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Get the maximum ID from raw.UpworkDataJson table
-    cur.execute('''
-        SELECT MAX("RawId") FROM raw."UpworkDataJson"
-    ''')
-    
-    result = cur.fetchone()
-    if result and result[0] is not None:
-        raw_id = result[0]
-        print(f"Retrieved latest raw_id from raw.UpworkDataJson: {raw_id}")
-    else:
-        print("No records found in raw.UpworkDataJson table")
-        cur.close()
-        conn.close()
-        return None
-    
-    # Insert each row from DataFrame into staging.lead
-    inserted_count = 0
-    for index, row in df.iterrows():
-        # Map DataFrame columns to staging.lead columns
-        cur.execute('''
-            INSERT INTO staging.lead (
-                lead_name, 
-                "desc", 
-                time_posted, 
-                link, 
-                raw_id,
-                budget_type,
-                hour_rate_low,
-                hour_rate_high,
-                fix_price
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (
-            row.get('Title', 'N/A'),                    # lead_name
-            row.get('Description', 'N/A'),              # desc  
-            row.get('Posted Time'),                     # time_posted
-            row.get('Job Link', 'N/A'),                 # link
-            raw_id,                                     # raw_id
-            row.get('Budget Type', 'N/A'),              # budget_type
-            row.get('Lower Hourly Rate', 'N/A'),        # hour_rate_low
-            row.get('Higher Hourly Rate', 'N/A'),       # hour_rate_high
-            row.get('Fixed Price', 'N/A')               # fix_price
+        return []
+
+    if raw_id is None:
+        print("No raw.UpworkDataJson row given, nothing staged")
+        return []
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+
+        # Load all rows into staging.lead in one batch; links already staged are skipped
+        links = [canonical_job_link(link) for link in _df_column(df, 'Job Link', 'N/A')]
+        rows = list(zip(
+            _df_column(df, 'Title', 'N/A'),                 # lead_name
+            _df_column(df, 'Description', 'N/A'),           # desc
+            _df_column(df, 'Posted Time'),                  # time_posted
+            links,                                          # link
+            [raw_id] * len(df),                             # raw_id
+            _df_column(df, 'Budget Type', 'N/A'),           # budget_type
+            _df_column(df, 'Lower Hourly Rate', 'N/A'),     # hour_rate_low
+            _df_column(df, 'Higher Hourly Rate', 'N/A'),    # hour_rate_high
+            _df_column(df, 'Fixed Price', 'N/A'),           # fix_price
+            _df_column(df, 'Lower Hourly Rate USD'),        # hour_rate_low_usd
+            _df_column(df, 'Higher Hourly Rate USD'),       # hour_rate_high_usd
+            _df_column(df, 'Fixed Price USD'),              # fix_price_usd
+            _df_column(df, 'Content Hash')                  # content_hash
         ))
-        inserted_count += 1
-    
-    print(f"Inserted {inserted_count} lead records into staging.lead with raw_id: {raw_id}")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    return raw_id
+        lead_ids = bulk_insert(cur, 'staging.lead', [
+            'lead_name',
+            '"desc"',
+            'time_posted',
+            'link',
+            'raw_id',
+            'budget_type',
+            'hour_rate_low',
+            'hour_rate_high',
+            'fix_price',
+            'hour_rate_low_usd',
+            'hour_rate_high_usd',
+            'fix_price_usd',
+            'content_hash'
+        ], rows, returning='lead_id, link', on_conflict='ON CONFLICT DO NOTHING')
 
-def insert_df_into_staging_client(df, max_lead_id_before):
-    
-    if df.empty:
-        print("DataFrame is empty, nothing to insert")
-        return 0
-        
-    print(f"Using max_lead_id_before: {max_lead_id_before}")
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Get leads with lead_id greater than max_lead_id_before
-    cur.execute('''
-        SELECT lead_id FROM staging.lead 
-        WHERE lead_id > %s
-        ORDER BY lead_id
-    ''', (max_lead_id_before,))
-    
-    new_lead_ids = [row[0] for row in cur.fetchall()]
-    print(f"Found {len(new_lead_ids)} new lead_ids: {new_lead_ids}")
-    
-    if not new_lead_ids:
+        staged = {link: lead_id for lead_id, link in lead_ids}
+        lead_ids = [staged.get(link) for link in links]
+
+        print(f"Inserted {len(staged)} lead records into staging.lead with raw_id: {raw_id}"
+              + (f" ({len(rows) - len(staged)} already staged)" if len(staged) < len(rows) else ""))
+
+    return lead_ids
+
+def insert_df_into_staging_client(df, lead_ids, conn=None, strategy=None):
+    """
+    Insert client data into staging.client for the leads just inserted
+
+    Args:
+        df: DataFrame containing client data
+        lead_ids: staging lead_ids returned by insert_df_into_staging_lead for df
+        conn: Optional existing connection (see db_connection)
+        strategy: Bulk load strategy passed to bulk_insert (None = by batch size)
+
+    Returns:
+        int: Number of records inserted
+    """
+
+    if df.empty or not lead_ids:
         print("No new leads found to insert client data for")
-        cur.close()
-        conn.close()
         return 0
-    
-    # Insert client data for each new lead
-    inserted_count = 0
-    for i, (index, row) in enumerate(df.iterrows()):
-        if i < len(new_lead_ids):
-            lead_id = new_lead_ids[i]
-            
-            cur.execute('''
-                INSERT INTO staging.client (
-                    client_name, 
-                    client_spent, 
-                    lead_id,
-                    payment_method
-                ) VALUES (%s, %s, %s, %s)
-            ''', (
-                row.get('Client Name', 'N/A'),          # client_name
-                row.get('Client Spent', 'N/A'),         # client_spent  
-                lead_id,                                 # lead_id
-                row.get('Payment Verified/Unverified', 'N/A')  # payment_method
-            ))
-            inserted_count += 1
-    
-    print(f"Inserted {inserted_count} client records into staging.client")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+
+        # Pair client data with each new lead and load them in one batch
+        rows = list(zip(
+            _df_column(df, 'Client Name', 'N/A'),                  # client_name
+            _df_column(df, 'Client Spent', 'N/A'),                 # client_spent
+            lead_ids,                                               # lead_id
+            _df_column(df, 'Payment Verified/Unverified', 'N/A'),  # payment_method
+            _df_column(df, 'Client Spent USD'),                     # client_spent_usd
+            _df_column(df, 'Payment Verified')                      # payment_verified
+        ))
+        inserted_count = bulk_insert(
+            cur, 'staging.client',
+            ['client_name', 'client_spent', 'lead_id', 'payment_method', 'client_spent_usd', 'payment_verified'],
+            rows, strategy=strategy
+        )
+
+        print(f"Inserted {inserted_count} client records into staging.client")
+
     return inserted_count
 
-def insert_df_into_staging_tag(df, max_lead_id_before):
+def insert_df_into_staging_tag(df, lead_ids, conn=None, strategy=None):
     """
-    Insert DataFrame into staging.tag table for leads with lead_id greater than max_lead_id_before
-    
+    Insert tag data into staging.tag for the leads just inserted
+
     Args:
         df: DataFrame containing tag data
-        max_lead_id_before: Maximum lead_id before the current insertion
-        
+        lead_ids: staging lead_ids returned by insert_df_into_staging_lead for df
+        conn: Optional existing connection (see db_connection)
+        strategy: Bulk load strategy passed to bulk_insert (None = by batch size)
+
     Returns:
         int: Number of records inserted
     """
-    
-    if df.empty:
-        print("DataFrame is empty, nothing to insert")
-        return 0
-        
-    print(f"Using max_lead_id_before for tags: {max_lead_id_before}")
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Get leads with lead_id greater than max_lead_id_before
-    cur.execute('''
-        SELECT lead_id FROM staging.lead 
-        WHERE lead_id > %s
-        ORDER BY lead_id
-    ''', (max_lead_id_before,))
-    
-    new_lead_ids = [row[0] for row in cur.fetchall()]
-    print(f"Found {len(new_lead_ids)} new lead_ids for tags: {new_lead_ids}")
-    
-    if not new_lead_ids:
+
+    if df.empty or not lead_ids:
         print("No new leads found to insert tag data for")
-        cur.close()
-        conn.close()
         return 0
-    
-    # Insert tag data for each new lead
-    inserted_count = 0
-    for i, (index, row) in enumerate(df.iterrows()):
-        if i < len(new_lead_ids):
-            lead_id = new_lead_ids[i]
-            
-            cur.execute('''
-                INSERT INTO staging.tag (
-                    tag_list, 
-                    lead_id
-                ) VALUES (%s, %s)
-            ''', (
-                row.get('Tags', 'N/A'),                 # tag_list
-                lead_id                                 # lead_id
-            ))
-            inserted_count += 1
-    
-    print(f"Inserted {inserted_count} tag records into staging.tag")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+
+        # Pair tag data with each new lead and load them in one batch
+        rows = list(zip(
+            _df_column(df, 'Tags', 'N/A'),     # tag_list
+            lead_ids                           # lead_id
+        ))
+        inserted_count = bulk_insert(cur, 'staging.tag', ['tag_list', 'lead_id'], rows, strategy=strategy)
+
+        print(f"Inserted {inserted_count} tag records into staging.tag")
+
     return inserted_count
 
+def update_changed_leads(df, conn=None):
+    """
+    Apply edits of already published jobs in one statement.
+
+    Rows are matched to published.lead by canonical link; only leads whose
+    content_hash differs are updated (lead fields, tags) and get a
+    published.lead_history row holding the previous values of the changed
+    fields. Leads stored before hashes existed only get their hash and
+    fields refreshed, without history. Rows of new jobs match nothing.
+
+    Args:
+        df: DataFrame of scraped jobs with canonical links and a Content Hash column
+        conn: Optional existing connection (see db_connection)
+
+    Returns:
+        dict: leads updated and history rows written
+    """
+    if df.empty or 'Content Hash' not in df.columns:
+        return {'updated': 0, 'history': 0}
+
+    rows = list(zip(
+        _df_column(df, 'Job Link'),                     # link
+        _df_column(df, 'Content Hash'),                 # content_hash
+        _df_column(df, 'Title', 'N/A'),                 # lead_name
+        _df_column(df, 'Description', 'N/A'),           # desc
+        _df_column(df, 'Budget Type', 'N/A'),           # budget_type
+        _df_column(df, 'Lower Hourly Rate', 'N/A'),     # hour_rate_low
+        _df_column(df, 'Higher Hourly Rate', 'N/A'),    # hour_rate_high
+        _df_column(df, 'Fixed Price', 'N/A'),           # fix_price
+        _df_column(df, 'Lower Hourly Rate USD'),        # hour_rate_low_usd
+        _df_column(df, 'Higher Hourly Rate USD'),       # hour_rate_high_usd
+        _df_column(df, 'Fixed Price USD'),              # fix_price_usd
+        _df_column(df, 'Tags', 'N/A')                   # tag_list
+    ))
+
+    ensure_content_hash_columns()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        changed = execute_values(cur, '''
+            WITH incoming (
+                "link", "content_hash", "lead_name", "desc", "budget_type",
+                "hour_rate_low", "hour_rate_high", "fix_price",
+                "hour_rate_low_usd", "hour_rate_high_usd", "fix_price_usd", "tag_list"
+            ) AS (
+                VALUES %s
+            ),
+            changed AS (
+                SELECT
+                    DL."lead_id",
+                    DL."content_hash" AS old_hash,
+                    I.*,
+                    jsonb_strip_nulls(jsonb_build_object(
+                        'lead_name', CASE WHEN DL."lead_name" IS DISTINCT FROM I."lead_name" THEN DL."lead_name" END,
+                        'desc', CASE WHEN DL."desc" IS DISTINCT FROM I."desc" THEN DL."desc" END,
+                        'budget_type', CASE WHEN DL."budget_type" IS DISTINCT FROM I."budget_type" THEN DL."budget_type" END,
+                        'hour_rate_low', CASE WHEN DL."hour_rate_low" IS DISTINCT FROM I."hour_rate_low" THEN DL."hour_rate_low" END,
+                        'hour_rate_high', CASE WHEN DL."hour_rate_high" IS DISTINCT FROM I."hour_rate_high" THEN DL."hour_rate_high" END,
+                        'fix_price', CASE WHEN DL."fix_price" IS DISTINCT FROM I."fix_price" THEN DL."fix_price" END,
+                        'tag_list', CASE WHEN PT."tag_list" IS DISTINCT FROM I."tag_list" THEN PT."tag_list" END
+                    )) AS changes
+                FROM incoming I
+                JOIN "published"."lead" DL ON "published"."canonical_job_link"(DL."link") = I."link"
+                LEFT JOIN LATERAL (
+                    SELECT T."tag_list" FROM "published"."tag" T
+                    WHERE T."lead_id" = DL."lead_id"
+                    LIMIT 1
+                ) PT ON true
+                WHERE DL."content_hash" IS DISTINCT FROM I."content_hash"
+                FOR UPDATE OF DL
+            ),
+            updated_leads AS (
+                UPDATE "published"."lead" DL
+                SET "lead_name" = C."lead_name",
+                    "desc" = C."desc",
+                    "budget_type" = C."budget_type",
+                    "hour_rate_low" = C."hour_rate_low",
+                    "hour_rate_high" = C."hour_rate_high",
+                    "fix_price" = C."fix_price",
+                    "hour_rate_low_usd" = C."hour_rate_low_usd",
+                    "hour_rate_high_usd" = C."hour_rate_high_usd",
+                    "fix_price_usd" = C."fix_price_usd",
+                    "content_hash" = C."content_hash"
+                FROM changed C
+                WHERE DL."lead_id" = C."lead_id"
+                RETURNING 1
+            ),
+            updated_tags AS (
+                UPDATE "published"."tag" T
+                SET "tag_list" = C."tag_list"
+                FROM changed C
+                WHERE T."lead_id" = C."lead_id"
+                  AND T."tag_list" IS DISTINCT FROM C."tag_list"
+                  AND C."tag_list" NOT IN ('N/A', '')
+                RETURNING 1
+            ),
+            inserted_tags AS (
+                INSERT INTO "published"."tag" ("tag_list", "lead_id")
+                SELECT C."tag_list", C."lead_id"
+                FROM changed C
+                WHERE C."tag_list" NOT IN ('N/A', '')
+                  AND NOT EXISTS (SELECT 1 FROM "published"."tag" T WHERE T."lead_id" = C."lead_id")
+                RETURNING 1
+            ),
+            history AS (
+                INSERT INTO "published"."lead_history" ("lead_id", "old_hash", "new_hash", "changes")
+                SELECT "lead_id", "old_hash", "content_hash", "changes"
+                FROM changed
+                WHERE "old_hash" IS NOT NULL
+                RETURNING 1
+            )
+            SELECT "lead_id", "old_hash" IS NOT NULL FROM changed
+        ''', rows,
+            template='(%s, %s, %s, %s, %s, %s, %s, %s, %s::numeric, %s::numeric, %s::numeric, %s)',
+            page_size=BULK_PAGE_SIZE, fetch=True
+        )
+
+    history = sum(1 for lead_id, edited in changed if edited)
+    if changed:
+        print(f"✏️ Updated {len(changed)} edited published leads ({history} history rows, "
+              f"{len(changed) - history} hash backfills)")
+    return {'updated': len(changed), 'history': history}
+
+def insert_df_into_staging(df, conn=None, raw_id=None):
+    """
+    Insert a scraped DataFrame into staging.lead, staging.client and staging.tag
+    in one transaction, keyed by the lead_ids returned from the lead insert
+
+    Jobs whose canonical link is already published (LinkCache) are not
+    staged again; links already in staging are skipped by the unique index,
+    so each job is staged once. Published jobs whose cached content_hash
+    still matches are not written at all; every other row goes through
+    update_changed_leads, which only touches leads that were edited.
+
+    Args:
+        df: DataFrame of scraped jobs
+        conn: Optional existing connection (see db_connection)
+        raw_id: RawId returned by insert_raw_json_data for this batch
+
+    Returns:
+        dict: lead_ids, clients_inserted, tags_inserted, known_skipped and leads_updated
+    """
+    known = unchanged = None
+    if not df.empty and 'Job Link' in df.columns:
+        df = df.assign(**{'Job Link': df['Job Link'].map(canonical_job_link)})
+        df = df.drop_duplicates(subset=['Job Link'], keep='first')
+        link_cache = get_link_cache()
+        known = df['Job Link'].map(lambda link: link in link_cache)
+        unchanged = known
+        if 'Content Hash' in df.columns:
+            unchanged = known & (df['Job Link'].map(link_cache.get) == df['Content Hash'])
+    known_skipped = int(known.sum()) if known is not None else 0
+    if known_skipped:
+        print(f"🧠 Skipping {known_skipped} already published jobs ({int(unchanged.sum())} unchanged)")
+
+    with db_connection(conn) as conn:
+        ensure_typed_money_columns()
+        ensure_lead_link_unique_indexes()
+        ensure_content_hash_columns()
+        leads_updated = update_changed_leads(df if unchanged is None else df[~unchanged], conn=conn)['updated']
+        if known is not None:
+            df = df[~known]
+        lead_ids = insert_df_into_staging_lead(df, conn=conn, raw_id=raw_id)
+
+        # Client and tag rows only for the leads that were actually staged
+        staged_rows = [i for i, lead_id in enumerate(lead_ids) if lead_id is not None]
+        df = df.iloc[staged_rows]
+        lead_ids = [lead_ids[i] for i in staged_rows]
+
+        clients_inserted = insert_df_into_staging_client(df, lead_ids, conn=conn)
+        tags_inserted = insert_df_into_staging_tag(df, lead_ids, conn=conn)
+
+    return {
+        'lead_ids': lead_ids,
+        'clients_inserted': clients_inserted,
+        'tags_inserted': tags_inserted,
+        'known_skipped': known_skipped,
+        'leads_updated': leads_updated
+    }
+
 import psycopg2
 import pandas as pd
-from database_operation import get_db_connection
 
-def get_new_leads_data():
+def get_new_leads_data(conn=None):
     """
     Get all new leads data that don't exist in published.lead using your exact query
-    
+
+    Args:
+        conn: Optional existing connection (see db_connection)
+
     Returns:
         pd.DataFrame: DataFrame with new leads data
     """
-    conn = get_db_connection()
-    
     query = """
-    SELECT 
+    SELECT
         SL."lead_name",
         SL."desc",
         SL."time_posted",
@@ -358,108 +1099,126 @@ def get_new_leads_data():
         SL."hour_rate_low",
         SL."hour_rate_high",
         SL."fix_price",
+        SL."hour_rate_low_usd",
+        SL."hour_rate_high_usd",
+        SL."fix_price_usd",
+        SL."content_hash",
         SL."raw_id",
         SL."lead_id" as staging_lead_id,
-        
+
         SC."client_name",
-        SC."client_spent", 
+        SC."client_spent",
         SC."payment_method",
-        
+        SC."client_spent_usd",
+        SC."payment_verified",
+
         ST."tag_list"
-    FROM 
-        "staging"."lead" SL 
-    LEFT JOIN 
-        "published"."lead" DL 
-    ON 
-        SL."link" = DL."link"
-    LEFT JOIN 
-        "staging"."client" SC 
-    ON 
+    FROM
+        "staging"."lead" SL
+    LEFT JOIN
+        "published"."lead" DL
+    ON
+        "published"."canonical_job_link"(SL."link") = "published"."canonical_job_link"(DL."link")
+    LEFT JOIN
+        "staging"."client" SC
+    ON
         SL."lead_id" = SC."lead_id"
-    LEFT JOIN 
-        "staging"."tag" ST 
-    ON 
+    LEFT JOIN
+        "staging"."tag" ST
+    ON
         SL."lead_id" = ST."lead_id"
-    WHERE 
+    WHERE
         DL."link" IS NULL
     ORDER BY SL."lead_id";
     """
-    
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    
+
+    ensure_typed_money_columns()
+    ensure_lead_link_unique_indexes()
+    ensure_content_hash_columns()
+    with db_connection(conn) as conn:
+        df = pd.read_sql_query(query, conn)
+
     print(f"📋 Found {len(df)} new leads to process")
     return df
 
-def insert_leads_to_published(df):
+def insert_leads_to_published(df, conn=None):
     """
     Insert leads data into published.lead table
-    
+
     Args:
         df (pd.DataFrame): DataFrame containing leads data
-        
+        conn: Optional existing connection (see db_connection)
+
     Returns:
         dict: mapping of staging_lead_id to new published_lead_id
     """
     if df.empty:
         print("No leads to insert")
         return {}
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
+
     lead_id_mapping = {}  # staging_lead_id -> published_lead_id
     inserted_count = 0
-    
+
     print(f"🔄 Inserting {len(df)} leads into published.lead...")
-    
-    for _, row in df.iterrows():
-        cur.execute("""
-            INSERT INTO "published"."lead" (
-                "lead_name", 
-                "desc", 
-                "time_posted", 
-                "link", 
-                "budget_type",
-                "hour_rate_low",
-                "hour_rate_high", 
-                "fix_price"
-                
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING "lead_id"
-        """, (
-            row['lead_name'],
-            row['desc'], 
-            row['time_posted'],
-            row['link'],
-            row['budget_type'],
-            row['hour_rate_low'],
-            row['hour_rate_high'],
-            row['fix_price']
-            
-        ))
-        
-        new_lead_id = cur.fetchone()[0]
-        lead_id_mapping[row['staging_lead_id']] = new_lead_id
-        inserted_count += 1
-        
-        print(f"✅ Inserted lead: {row['lead_name'][:50]}... (New ID: {new_lead_id})")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        for _, row in df.iterrows():
+            cur.execute("""
+                INSERT INTO "published"."lead" (
+                    "lead_name",
+                    "desc",
+                    "time_posted",
+                    "link",
+                    "budget_type",
+                    "hour_rate_low",
+                    "hour_rate_high",
+                    "fix_price",
+                    "hour_rate_low_usd",
+                    "hour_rate_high_usd",
+                    "fix_price_usd",
+                    "content_hash"
+
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT DO NOTHING
+                RETURNING "lead_id"
+            """, (
+                row['lead_name'],
+                row['desc'],
+                row['time_posted'],
+                row['link'],
+                row['budget_type'],
+                row['hour_rate_low'],
+                row['hour_rate_high'],
+                row['fix_price'],
+                _to_db_value(row.get('hour_rate_low_usd')),
+                _to_db_value(row.get('hour_rate_high_usd')),
+                _to_db_value(row.get('fix_price_usd')),
+                _to_db_value(row.get('content_hash'))
+
+            ))
+
+            inserted = cur.fetchone()
+            if inserted is None:
+                print(f"⏭️ Lead already published: {row['link']}")
+                continue
+            new_lead_id = inserted[0]
+            lead_id_mapping[row['staging_lead_id']] = new_lead_id
+            inserted_count += 1
+
+            print(f"✅ Inserted lead: {row['lead_name'][:50]}... (New ID: {new_lead_id})")
+
     print(f"🎉 Successfully inserted {inserted_count} leads into published.lead")
     return lead_id_mapping
 
-def insert_clients_to_published(df, lead_id_mapping):
+def insert_clients_to_published(df, lead_id_mapping, conn=None):
     """
     Insert client data into published.client table based on available lead info.
-    
+
     Args:
         df (pd.DataFrame): DataFrame containing lead-related client data
         lead_id_mapping (dict): mapping of staging_lead_id to published_lead_id
-        
+        conn: Optional existing connection (see db_connection)
+
     Returns:
         int: number of clients inserted
     """
@@ -467,145 +1226,358 @@ def insert_clients_to_published(df, lead_id_mapping):
         print("No data to insert")
         return 0
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
     inserted_count = 0
 
     print(f"🔄 Inserting client info for {len(df)} leads into published.client...")
 
-    for _, row in df.iterrows():
-        staging_lead_id = row['staging_lead_id']
-        published_lead_id = lead_id_mapping.get(staging_lead_id)
-
-        if published_lead_id is None:
-            print(f"⚠️ Warning: No published lead_id found for staging lead_id {staging_lead_id}")
-            continue
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        for _, row in df.iterrows():
+            staging_lead_id = row['staging_lead_id']
+            published_lead_id = lead_id_mapping.get(staging_lead_id)
 
-        cur.execute("""
-            INSERT INTO "published"."client" (
-                "client_name", 
-                "client_spent", 
-                "lead_id",
-                "payment_method"
-            ) VALUES (%s, %s, %s, %s)
-        """, (
-            row.get('client_name', None),  # Still insert if available, otherwise NULL
-            row.get('client_spent', None),
-            published_lead_id,
-            row.get('payment_method', None)
-        ))
+            if published_lead_id is None:
+                print(f"⚠️ Warning: No published lead_id found for staging lead_id {staging_lead_id}")
+                continue
 
-        inserted_count += 1
-        print(f"✅ Inserted client info for lead ID: {published_lead_id}")
+            cur.execute("""
+                INSERT INTO "published"."client" (
+                    "client_name",
+                    "client_spent",
+                    "lead_id",
+                    "payment_method",
+                    "client_spent_usd",
+                    "payment_verified"
+                ) VALUES (%s, %s, %s, %s, %s, %s)
+            """, (
+                row.get('client_name', None),  # Still insert if available, otherwise NULL
+                row.get('client_spent', None),
+                published_lead_id,
+                row.get('payment_method', None),
+                _to_db_value(row.get('client_spent_usd')),
+                _to_db_value(row.get('payment_verified'))
+            ))
 
-    conn.commit()
-    cur.close()
-    conn.close()
+            inserted_count += 1
+            print(f"✅ Inserted client info for lead ID: {published_lead_id}")
 
     print(f"🎉 Successfully inserted {inserted_count} clients into published.client")
     return inserted_count
 
-def insert_tags_to_published(df, lead_id_mapping):
+def insert_tags_to_published(df, lead_id_mapping, conn=None):
     """
     Insert tag data into published.tag table
-    
+
     Args:
         df (pd.DataFrame): DataFrame containing tag data
         lead_id_mapping (dict): mapping of staging_lead_id to published_lead_id
-        
+        conn: Optional existing connection (see db_connection)
+
     Returns:
         int: number of tags inserted
     """
     # Filter rows that have tag data
     tag_df = df[
-        (df['tag_list'].notna()) & 
-        (df['tag_list'] != 'N/A') & 
-        (df['tag_list'] != '') & 
+        (df['tag_list'].notna()) &
+        (df['tag_list'] != 'N/A') &
+        (df['tag_list'] != '') &
         (df['tag_list'] != None)
     ].copy()
-    
+
     if tag_df.empty:
         print("No tags to insert")
         return 0
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
+
     inserted_count = 0
-    
+
     print(f"🔄 Inserting {len(tag_df)} tags into published.tag...")
-    
-    for _, row in tag_df.iterrows():
-        staging_lead_id = row['staging_lead_id']
-        published_lead_id = lead_id_mapping.get(staging_lead_id)
-        
-        if published_lead_id is None:
-            print(f"⚠️ Warning: No published lead_id found for staging lead_id {staging_lead_id}")
-            continue
-            
-        cur.execute("""
-            INSERT INTO "published"."tag" (
-                "tag_list", 
-                "lead_id"
-            ) VALUES (%s, %s)
-        """, (
-            row['tag_list'],
-            published_lead_id
-        ))
-        
-        inserted_count += 1
-        print(f"✅ Inserted tags: {row['tag_list'][:50]}... (Lead ID: {published_lead_id})")
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    
+
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        for _, row in tag_df.iterrows():
+            staging_lead_id = row['staging_lead_id']
+            published_lead_id = lead_id_mapping.get(staging_lead_id)
+
+            if published_lead_id is None:
+                print(f"⚠️ Warning: No published lead_id found for staging lead_id {staging_lead_id}")
+                continue
+
+            cur.execute("""
+                INSERT INTO "published"."tag" (
+                    "tag_list",
+                    "lead_id"
+                ) VALUES (%s, %s)
+            """, (
+                row['tag_list'],
+                published_lead_id
+            ))
+
+            inserted_count += 1
+            print(f"✅ Inserted tags: {row['tag_list'][:50]}... (Lead ID: {published_lead_id})")
+
     print(f"🎉 Successfully inserted {inserted_count} tags into published.tag")
     return inserted_count
 
-def process_all_staging_to_published():
+def ensure_promotion_watermark_table():
+    """Create published.promotion_watermark if it does not exist yet."""
+    global _promotion_watermark_ready
+    if _promotion_watermark_ready:
+        return
+    with schema_cursor() as cur:
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS "published"."promotion_watermark" (
+                "source_id" integer PRIMARY KEY,
+                "last_staging_lead_id" bigint NOT NULL DEFAULT 0,
+                "updated_at" timestamp NOT NULL DEFAULT now()
+            )
+        ''')
+    _promotion_watermark_ready = True
+
+def lock_promotion_watermark(source_id=1, conn=None):
+    """
+    Lock a source's promotion watermark row until the transaction ends.
+
+    Writers take this lock before inserting staging rows and keep it through
+    promotion (persist_jobs does). Staging lead_ids are then handed out in
+    commit order per source, so a concurrent writer cannot move the mark
+    past rows another transaction has staged but not committed yet.
+
+    Returns:
+        int: the last promoted staging lead_id (0 if none yet)
+    """
+    ensure_promotion_watermark_table()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            INSERT INTO "published"."promotion_watermark" ("source_id")
+            VALUES (%s)
+            ON CONFLICT ("source_id") DO NOTHING
+        ''', (source_id,))
+        cur.execute('''
+            SELECT "last_staging_lead_id"
+            FROM "published"."promotion_watermark"
+            WHERE "source_id" = %s
+            FOR UPDATE
+        ''', (source_id,))
+        return cur.fetchone()[0]
+
+def promote_staging_to_published(conn=None, source_id=1, full_reconcile=False):
+    """
+    Set-based staging -> published promotion executed entirely inside Postgres.
+
+    One statement chains data-modifying CTEs: new staging leads (one row per
+    link, latest staging row wins) are inserted into published.lead, and the
+    RETURNING ids are joined back to staging.client / staging.tag to insert
+    their rows. No lead, client or tag data passes through Python.
+
+    Only staging leads of `source_id` above the persisted high-water mark in
+    published.promotion_watermark are considered, and the mark is advanced
+    to the highest one seen. The watermark row is locked for the whole
+    transaction (lock_promotion_watermark), so concurrent promotions of one
+    source run one at a time. Callers that stage rows in the same
+    transaction must take that lock before staging them; otherwise another
+    writer may advance the mark past their uncommitted lead_ids.
+
+    Args:
+        conn: Optional existing connection (see db_connection)
+        source_id: Source whose staging leads are promoted
+        full_reconcile: Ignore the watermark and re-check every staging lead
+                        of the source against published.lead (repair mode)
+
+    Returns:
+        dict: summary of all insertions
+    """
+    ensure_promotion_watermark_table()
+    ensure_typed_money_columns()
+    ensure_lead_link_unique_indexes()
+    ensure_content_hash_columns()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        watermark = lock_promotion_watermark(source_id, conn=conn)
+        if full_reconcile:
+            watermark = 0
+        print(f"Promoting staging leads of source {source_id} with lead_id > {watermark}"
+              + (" (full reconcile)" if full_reconcile else ""))
+
+        cur.execute("""
+            WITH candidate_leads AS (
+                SELECT SL.*
+                FROM "staging"."lead" SL
+                JOIN raw."UpworkDataJson" R ON R."RawId" = SL."raw_id"
+                JOIN public.job J ON J."id" = R."JobId"
+                WHERE SL."lead_id" > %(watermark)s
+                  AND J."source_id" = %(source_id)s
+            ),
+            new_leads AS (
+                SELECT DISTINCT ON ("published"."canonical_job_link"(SL."link"))
+                    SL."lead_id",
+                    SL."lead_name",
+                    SL."desc",
+                    SL."time_posted",
+                    SL."link",
+                    SL."budget_type",
+                    SL."hour_rate_low",
+                    SL."hour_rate_high",
+                    SL."fix_price",
+                    SL."hour_rate_low_usd",
+                    SL."hour_rate_high_usd",
+                    SL."fix_price_usd",
+                    SL."content_hash"
+                FROM candidate_leads SL
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM "published"."lead" DL
+                    WHERE "published"."canonical_job_link"(DL."link") = "published"."canonical_job_link"(SL."link")
+                )
+                ORDER BY "published"."canonical_job_link"(SL."link"), SL."lead_id" DESC
+            ),
+            inserted_leads AS (
+                INSERT INTO "published"."lead" (
+                    "lead_name",
+                    "desc",
+                    "time_posted",
+                    "link",
+                    "budget_type",
+                    "hour_rate_low",
+                    "hour_rate_high",
+                    "fix_price",
+                    "hour_rate_low_usd",
+                    "hour_rate_high_usd",
+                    "fix_price_usd",
+                    "content_hash"
+                )
+                SELECT
+                    "lead_name",
+                    "desc",
+                    "time_posted",
+                    "link",
+                    "budget_type",
+                    "hour_rate_low",
+                    "hour_rate_high",
+                    "fix_price",
+                    "hour_rate_low_usd",
+                    "hour_rate_high_usd",
+                    "fix_price_usd",
+                    "content_hash"
+                FROM new_leads
+                ORDER BY "lead_id"
+                ON CONFLICT DO NOTHING
+                RETURNING "lead_id", "link"
+            ),
+            lead_map AS (
+                SELECT NL."lead_id" AS staging_lead_id, IL."lead_id" AS published_lead_id
+                FROM inserted_leads IL
+                JOIN new_leads NL ON NL."link" = IL."link"
+            ),
+            inserted_clients AS (
+                INSERT INTO "published"."client" (
+                    "client_name",
+                    "client_spent",
+                    "lead_id",
+                    "payment_method",
+                    "client_spent_usd",
+                    "payment_verified"
+                )
+                SELECT SC."client_name", SC."client_spent", LM.published_lead_id, SC."payment_method",
+                       SC."client_spent_usd", SC."payment_verified"
+                FROM lead_map LM
+                LEFT JOIN "staging"."client" SC ON SC."lead_id" = LM.staging_lead_id
+                RETURNING 1
+            ),
+            inserted_tags AS (
+                INSERT INTO "published"."tag" (
+                    "tag_list",
+                    "lead_id"
+                )
+                SELECT ST."tag_list", LM.published_lead_id
+                FROM lead_map LM
+                JOIN "staging"."tag" ST ON ST."lead_id" = LM.staging_lead_id
+                WHERE ST."tag_list" IS NOT NULL
+                  AND ST."tag_list" NOT IN ('N/A', '')
+                RETURNING 1
+            )
+            SELECT
+                (SELECT COUNT(*) FROM inserted_leads),
+                (SELECT COUNT(*) FROM inserted_clients),
+                (SELECT COUNT(*) FROM inserted_tags),
+                (SELECT MAX("lead_id") FROM candidate_leads)
+        """, {'watermark': watermark, 'source_id': source_id})
+        leads_inserted, clients_inserted, tags_inserted, max_lead_id = cur.fetchone()
+
+        if max_lead_id is not None:
+            cur.execute('''
+                UPDATE "published"."promotion_watermark"
+                SET "last_staging_lead_id" = GREATEST("last_staging_lead_id", %s),
+                    "updated_at" = now()
+                WHERE "source_id" = %s
+            ''', (max_lead_id, source_id))
+            print(f"Advanced promotion watermark for source {source_id} to {max_lead_id}")
+
+    return {
+        'leads_inserted': leads_inserted,
+        'clients_inserted': clients_inserted,
+        'tags_inserted': tags_inserted,
+        'message': 'Success' if leads_inserted else 'No new data to process'
+    }
+
+def process_all_staging_to_published(conn=None, mode='set', source_id=1, full_reconcile=False):
     """
     Main function that processes all staging data to published tables
-    Calls all individual functions in sequence
-    
+
+    Args:
+        conn: Optional existing connection (see db_connection). When omitted,
+              all steps share one pooled connection and commit together.
+        mode: 'set' runs promote_staging_to_published inside Postgres;
+              'rows' calls the individual per-row functions in sequence
+              (always a full scan of staging.lead)
+        source_id: In 'set' mode, source whose staging leads are promoted
+        full_reconcile: In 'set' mode, ignore the promotion watermark
+
     Returns:
         dict: summary of all insertions
     """
     print("🚀 Starting complete staging to published transfer...")
     print("="*60)
-    
-    # Step 1: Get new leads data using your query
-    print("Step 1: Getting new leads data...")
-    df = get_new_leads_data()
-    
-    if df.empty:
-        print("✅ No new data found - all staging data already exists in published tables")
-        return {
-            'leads_inserted': 0,
-            'clients_inserted': 0,
-            'tags_inserted': 0,
-            'message': 'No new data to process'
-        }
-    
-    print(f"Found {len(df)} new records to process")
-    print("-"*60)
-    
-    # Step 2: Insert leads first (must be first to get lead_id mapping)
-    print("Step 2: Inserting leads...")
-    lead_id_mapping = insert_leads_to_published(df)
-    print("-"*60)
-    
-    # Step 3: Insert clients using lead_id mapping
-    print("Step 3: Inserting clients...")
-    clients_inserted = insert_clients_to_published(df, lead_id_mapping)
-    print("-"*60)
-    
-    # Step 4: Insert tags using lead_id mapping  
-    print("Step 4: Inserting tags...")
-    tags_inserted = insert_tags_to_published(df, lead_id_mapping)
-    print("-"*60)
-    
+
+    if mode == 'set':
+        summary = promote_staging_to_published(
+            conn=conn, source_id=source_id, full_reconcile=full_reconcile
+        )
+        print("🎉 COMPLETE! Summary:")
+        print(f"   • Leads inserted: {summary['leads_inserted']}")
+        print(f"   • Clients inserted: {summary['clients_inserted']}")
+        print(f"   • Tags inserted: {summary['tags_inserted']}")
+        return summary
+    elif mode != 'rows':
+        raise ValueError(f"Unknown promotion mode: {mode}")
+
+    with db_connection(conn) as conn:
+        # Step 1: Get new leads data using your query
+        print("Step 1: Getting new leads data...")
+        df = get_new_leads_data(conn=conn)
+
+        if df.empty:
+            print("✅ No new data found - all staging data already exists in published tables")
+            return {
+                'leads_inserted': 0,
+                'clients_inserted': 0,
+                'tags_inserted': 0,
+                'message': 'No new data to process'
+            }
+
+        print(f"Found {len(df)} new records to process")
+        print("-"*60)
+
+        # Step 2: Insert leads first (must be first to get lead_id mapping)
+        print("Step 2: Inserting leads...")
+        lead_id_mapping = insert_leads_to_published(df, conn=conn)
+        print("-"*60)
+
+        # Step 3: Insert clients using lead_id mapping
+        print("Step 3: Inserting clients...")
+        clients_inserted = insert_clients_to_published(df, lead_id_mapping, conn=conn)
+        print("-"*60)
+
+        # Step 4: Insert tags using lead_id mapping
+        print("Step 4: Inserting tags...")
+        tags_inserted = insert_tags_to_published(df, lead_id_mapping, conn=conn)
+        print("-"*60)
+
     summary = {
         'leads_inserted': len(lead_id_mapping),
         'clients_inserted': clients_inserted,
@@ -613,54 +1585,51 @@ def process_all_staging_to_published():
         'lead_id_mapping': lead_id_mapping,
         'message': 'Success'
     }
-    
+
     print("🎉 COMPLETE! Summary:")
     print(f"   • Leads inserted: {summary['leads_inserted']}")
     print(f"   • Clients inserted: {summary['clients_inserted']}")
     print(f"   • Tags inserted: {summary['tags_inserted']}")
-    
+
     return summary
 
-def check_staging_vs_published():
+def check_staging_vs_published(conn=None):
     """
     Quick check to see how many records are in staging vs published
     and how many are new (would be inserted)
     """
-    conn = get_db_connection()
-    
-    # Count staging records
-    staging_count = pd.read_sql_query(
-        'SELECT COUNT(*) as count FROM "staging"."lead"', 
-        conn
-    )['count'][0]
-    
-    # Count published records  
-    published_count = pd.read_sql_query(
-        'SELECT COUNT(*) as count FROM "published"."lead"',
-        conn
-    )['count'][0]
-    
-    # Count new records (using your duplicate-check query)
-    new_records_query = """
-    SELECT COUNT(*) as count
-    FROM "staging"."lead" SL 
-    LEFT JOIN "published"."lead" DL 
-    ON SL."link" = DL."link"
-    WHERE DL."link" IS NULL
-    """
-    new_count = pd.read_sql_query(new_records_query, conn)['count'][0]
-    
-    conn.close()
-    
+    with db_connection(conn) as conn:
+        # Count staging records
+        staging_count = pd.read_sql_query(
+            'SELECT COUNT(*) as count FROM "staging"."lead"',
+            conn
+        )['count'][0]
+
+        # Count published records
+        published_count = pd.read_sql_query(
+            'SELECT COUNT(*) as count FROM "published"."lead"',
+            conn
+        )['count'][0]
+
+        # Count new records (using your duplicate-check query)
+        new_records_query = """
+        SELECT COUNT(*) as count
+        FROM "staging"."lead" SL
+        LEFT JOIN "published"."lead" DL
+        ON "published"."canonical_job_link"(SL."link") = "published"."canonical_job_link"(DL."link")
+        WHERE DL."link" IS NULL
+        """
+        new_count = pd.read_sql_query(new_records_query, conn)['count'][0]
+
     print(f"📊 DATABASE STATUS:")
     print(f"   • Records in staging.lead: {staging_count}")
     print(f"   • Records in published.lead: {published_count}")
     print(f"   • New records to be inserted: {new_count}")
     print(f"   • Duplicate records (will be skipped): {staging_count - new_count}")
-    
+
     return {
         'staging_count': staging_count,
-        'published_count': published_count, 
+        'published_count': published_count,
         'new_count': new_count,
         'duplicate_count': staging_count - new_count
     }
@@ -669,45 +1638,154 @@ def check_staging_vs_published():
 
 
 
-def mark_current_practice_processed():
-    """Set status = 1 on the oldest practice with status = 0."""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('''
-        UPDATE "published"."practice"
-        SET "status" = 1
-        WHERE "id" = (
-            SELECT "id"
-            FROM "published"."practice"
-            WHERE "status" = 0
-            ORDER BY "id" ASC
-            LIMIT 1
-        )
-    ''')
-    conn.commit()
-    cur.close()
-    conn.close()
-    print("🔄 Marked oldest unpublished practice (status=0) as processed (status=1).")
-
-def reset_practice_status_if_none_active():
+def reset_practice_status_if_none_active(conn=None):
     """
     If there's no row with status = 0, reset all !=0 to 0.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('''
-        UPDATE "published"."practice"
-        SET "status" = 0
-        WHERE NOT EXISTS (
-            SELECT 1 FROM "published"."practice" WHERE "status" = 0
-        )
-        AND "status" != 0
-    ''')
-    rows = cur.rowcount
-    conn.commit()
-    cur.close()
-    conn.close()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "published"."practice"
+            SET "status" = 0
+            WHERE NOT EXISTS (
+                SELECT 1 FROM "published"."practice" WHERE "status" = 0
+            )
+            AND "status" != 0
+        ''')
+        rows = cur.rowcount
     if rows:
         print(f"🔄 Reset {rows} practice rows to status = 0 (none were active).")
     else:
         print("ℹ No need to reset: there is already an active practice row.")
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def ensure_practice_lease_columns():
+    """Add the lease columns used by claim_practice_row to published.practice."""
+    global _practice_lease_ready
+    if _practice_lease_ready:
+        return
+    with schema_cursor() as cur:
+        if _missing_columns(cur, 'published', 'practice', ['leased_by', 'lease_expires_at']):
+            cur.execute('''
+                ALTER TABLE "published"."practice"
+                    ADD COLUMN IF NOT EXISTS "leased_by" text,
+                    ADD COLUMN IF NOT EXISTS "lease_expires_at" timestamp
+            ''')
+    _practice_lease_ready = True
+
+def ensure_schema():
+    """
+    Run every ensure_* helper once, at process start, before any write
+    transaction is open. Later calls inside the write paths are then no-ops.
+    """
+    ensure_practice_lease_columns()
+    ensure_practice_fingerprint_column()
+    ensure_typed_money_columns()
+    ensure_lead_link_unique_indexes()
+    ensure_content_hash_columns()
+    ensure_promotion_watermark_table()
+    ensure_job_query_table()
+
+def claim_practice_row(worker_id, lease_seconds=PRACTICE_LEASE_SECONDS, conn=None):
+    """
+    Atomically lease the oldest pending practice row for this worker.
+
+    Rows locked by another transaction are skipped (FOR UPDATE SKIP LOCKED),
+    and rows whose lease has expired are up for grabs again, so many workers
+    on many hosts can share the queue. The lease is committed immediately.
+
+    Returns:
+        dict: {"id", "search_criteria"} of the claimed row, or None if the queue is empty
+    """
+    ensure_practice_lease_columns()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "published"."practice"
+            SET "leased_by" = %s,
+                "lease_expires_at" = now() + make_interval(secs => %s)
+            WHERE "id" = (
+                SELECT "id"
+                FROM "published"."practice"
+                WHERE "status" = 0
+                  AND ("lease_expires_at" IS NULL OR "lease_expires_at" < now())
+                ORDER BY "id" ASC
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING "id", "search_criteria"
+        ''', (worker_id, lease_seconds))
+        row = cur.fetchone()
+    if row:
+        print(f"🔒 Worker {worker_id} leased practice row {row[0]} for {lease_seconds}s")
+        return {"id": row[0], "search_criteria": row[1]}
+    return None
+
+def renew_practice_lease(practice_id, worker_id, lease_seconds=PRACTICE_LEASE_SECONDS, conn=None):
+    """Extend this worker's lease on a practice row. Returns False if the lease was lost."""
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "published"."practice"
+            SET "lease_expires_at" = now() + make_interval(secs => %s)
+            WHERE "id" = %s AND "leased_by" = %s AND "status" = 0
+        ''', (lease_seconds, practice_id, worker_id))
+        return cur.rowcount == 1
+
+def release_practice_lease(practice_id, worker_id, conn=None):
+    """Give a leased practice row back to the queue without processing it."""
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "published"."practice"
+            SET "leased_by" = NULL, "lease_expires_at" = NULL
+            WHERE "id" = %s AND "leased_by" = %s
+        ''', (practice_id, worker_id))
+    print(f"🔓 Released lease on practice row {practice_id}")
+
+def mark_practice_processed(practice_id, worker_id=None, conn=None):
+    """
+    Set status = 1 on a specific practice row and clear its lease.
+
+    When `worker_id` is given the update only applies while that worker still
+    holds the lease. Returns True if the row was updated.
+    """
+    ensure_practice_lease_columns()
+    with db_connection(conn) as conn, conn.cursor() as cur:
+        cur.execute('''
+            UPDATE "published"."practice"
+            SET "status" = 1, "leased_by" = NULL, "lease_expires_at" = NULL
+            WHERE "id" = %s
+              AND (%s::text IS NULL OR "leased_by" = %s)
+        ''', (practice_id, worker_id, worker_id))
+        updated = cur.rowcount == 1
+    if updated:
+        print(f"🔄 Marked practice row {practice_id} as processed (status=1).")
+    else:
+        print(f"⚠️ Practice row {practice_id} was not marked processed - lease lost to another worker?")
+    return updated
+
+@contextmanager
+def practice_lease_heartbeat(practice_id, worker_id, lease_seconds=PRACTICE_LEASE_SECONDS, interval=None):
+    """
+    Keep renewing a practice lease from a background thread while the body runs.
+
+    Renews every `interval` seconds (a third of the lease by default).
+    """
+    interval = interval if interval is not None else max(lease_seconds / 3, 1)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                if not renew_practice_lease(practice_id, worker_id, lease_seconds):
+                    print(f"⚠️ Lost lease on practice row {practice_id}")
+                    return
+            except Exception as e:
+                print(f"⚠️ Lease heartbeat failed for practice row {practice_id}: {e}")
+
+    thread = threading.Thread(target=beat, name=f"lease-heartbeat-{practice_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Write tasks allowed to wait for the writer before submit() blocks the scraper
+WRITER_QUEUE_SIZE = int(os.getenv('DB_WRITER_QUEUE_SIZE', 2))
+
+class DBWriter:
+    """
+    Background database stage fed by the scraper through a bounded queue.
+
+    Tasks run one at a time, in submission order, on a single writer thread
+    that takes its connections from the shared pool (db_connection). FIFO
+    order matters: a run's public.job record, its pages and its final
+    watermark update land in the order they were scraped.
+
+    When `queue_size` tasks are already waiting, submit() blocks until the
+    writer catches up (backpressure), so memory stays bounded while Chrome and
+    Postgres work at the same time. Each submit() returns a Future carrying
+    the task's result or exception.
+
+    Usage:
+        with DBWriter() as writer:
+            future = writer.submit(persist_jobs, jobs, job_id=job_id)
+        # leaving the block flushes every queued task and stops the thread
+    """
+
+    _STOP = object()
+
+    def __init__(self, queue_size=None, name="db-writer"):
+        self.queue_size = queue_size or WRITER_QUEUE_SIZE
+        self.name = name
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._closed = False
+        self.stats = {
+            'tasks': 0,
+            'failed': 0,
+            'busy_seconds': 0.0,
+            'blocked_submits': 0,
+            'blocked_seconds': 0.0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for the writer thread, blocking while the queue is full.
+
+        Returns:
+            concurrent.futures.Future: resolves to the task's return value
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        self.start()
+
+        future = Future()
+        item = (future, fn, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(item)
+            self.stats['blocked_submits'] += 1
+            self.stats['blocked_seconds'] += time.perf_counter() - started
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.perf_counter()
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    self.stats['failed'] += 1
+                    print(f" ⚠️ {self.name} task {getattr(fn, '__name__', fn)} failed: {e}")
+                    traceback.print_exc()
+                    future.set_exception(e)
+                finally:
+                    self.stats['tasks'] += 1
+                    self.stats['busy_seconds'] += time.perf_counter() - started
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every task submitted so far has finished."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush the queue, stop the writer thread and print its statistics."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        print(f"🗄️ {self.name}: {self.stats['tasks']} tasks ({self.stats['failed']} failed), "
+              f"busy {self.stats['busy_seconds']:.1f}s, scraper blocked "
+              f"{self.stats['blocked_submits']}x for {self.stats['blocked_seconds']:.1f}s")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,240 @@
+import os
+import sys
+import uuid
+from datetime import date, datetime
+from urllib.parse import quote
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Root of the archive: <dir>/search_query=<query>/scrape_date=<YYYY-MM-DD>/part-*.parquet
+ARCHIVE_DIR = os.getenv('JOB_ARCHIVE_DIR', 'job_archive')
+
+# A partition with at least this many part files is merged into one file
+COMPACT_MIN_FILES = int(os.getenv('JOB_ARCHIVE_COMPACT_MIN_FILES', 24))
+
+# DataFrame column -> archive column
+ARCHIVE_COLUMNS = {
+    'Title': 'title',
+    'Job Link': 'job_link',
+    'Tags': 'tags',
+    'Client Spent': 'client_spent',
+    'Payment Info': 'payment_info',
+    'Budget Type': 'budget_type',
+    'Lower Hourly Rate': 'lower_hourly_rate',
+    'Higher Hourly Rate': 'higher_hourly_rate',
+    'Fixed Price': 'fixed_price',
+    'Payment Verified/Unverified': 'payment_verified_text',
+    'Description': 'description',
+    'Posted Time': 'posted_time',
+    'Lower Hourly Rate USD': 'hour_rate_low_usd',
+    'Higher Hourly Rate USD': 'hour_rate_high_usd',
+    'Fixed Price USD': 'fix_price_usd',
+    'Client Spent USD': 'client_spent_usd',
+    'Payment Verified': 'payment_verified',
+}
+
+def _pyarrow():
+    # Optional dependency: only needed when the archive is written or read
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.parquet
+    return pyarrow
+
+def archive_schema():
+    """Typed schema of the archive's data files (partition columns live in the path)."""
+    pa = _pyarrow()
+    return pa.schema([
+        ('title', pa.string()),
+        ('job_link', pa.string()),
+        ('tags', pa.string()),
+        ('client_spent', pa.string()),
+        ('payment_info', pa.string()),
+        ('budget_type', pa.string()),
+        ('lower_hourly_rate', pa.string()),
+        ('higher_hourly_rate', pa.string()),
+        ('fixed_price', pa.string()),
+        ('payment_verified_text', pa.string()),
+        ('description', pa.string()),
+        ('posted_time', pa.timestamp('us')),
+        ('hour_rate_low_usd', pa.float64()),
+        ('hour_rate_high_usd', pa.float64()),
+        ('fix_price_usd', pa.float64()),
+        ('client_spent_usd', pa.float64()),
+        ('payment_verified', pa.bool_()),
+        ('scraped_at', pa.timestamp('us')),
+    ])
+
+def _partitioning():
+    pa = _pyarrow()
+    return pa.dataset.partitioning(
+        pa.schema([('search_query', pa.string()), ('scrape_date', pa.date32())]),
+        flavor='hive'
+    )
+
+def partition_dir(search_query, scrape_date, archive_dir=None):
+    """Directory of one (search query, scrape date) partition."""
+    return os.path.join(
+        archive_dir or ARCHIVE_DIR,
+        f"search_query={quote(search_query, safe='')}",
+        f"scrape_date={scrape_date.isoformat()}"
+    )
+
+def _part_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith('part-') and name.endswith('.parquet')
+    )
+
+def _write_part(table, directory, prefix='part'):
+    """Write a table to a new uniquely named file (atomically, via a temp name)."""
+    pa = _pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{prefix}-{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(directory, name)
+    # Dot-prefixed while being written, so readers' dataset discovery skips it
+    temp_path = os.path.join(directory, f".{name}.tmp")
+    pa.parquet.write_table(table, temp_path, compression='zstd')
+    os.replace(temp_path, path)
+    return path
+
+def archive_jobs(df, search_query, scraped_at=None, archive_dir=None, compact=True):
+    """
+    Append a DataFrame of scraped jobs (see json_to_dataframe) to the archive.
+
+    Every call writes one new Parquet file into the partition of
+    `search_query` and the scrape date; files are never rewritten in place.
+    When the partition has COMPACT_MIN_FILES files it is compacted.
+
+    Args:
+        df (pd.DataFrame): scraped jobs
+        search_query (str): query the jobs were scraped for
+        scraped_at (datetime): scrape time (now when omitted)
+        archive_dir (str): archive root (JOB_ARCHIVE_DIR when omitted)
+        compact (bool): compact the partition once it has enough small files
+
+    Returns:
+        str: path of the written file, or None when df is empty
+    """
+    if df.empty:
+        return None
+    pa = _pyarrow()
+    scraped_at = scraped_at or datetime.now()
+
+    data = pd.DataFrame(index=df.index)
+    for column, name in ARCHIVE_COLUMNS.items():
+        data[name] = df[column] if column in df.columns else None
+    data['posted_time'] = pd.to_datetime(data['posted_time'], errors='coerce')
+    data['scraped_at'] = scraped_at
+
+    table = pa.Table.from_pandas(data, schema=archive_schema(), preserve_index=False)
+    directory = partition_dir(search_query, scraped_at.date(), archive_dir)
+    path = _write_part(table, directory)
+    print(f"🗃️ Archived {len(df)} jobs to {path}")
+
+    if compact and len(_part_files(directory)) >= COMPACT_MIN_FILES:
+        compact_partition(directory)
+    return path
+
+def compact_partition(directory):
+    """
+    Merge every part file of one partition into a single file.
+
+    Only the files listed at the start are replaced, so writers appending to
+    the partition at the same time lose nothing.
+
+    Returns:
+        int: number of files merged (0 when there was nothing to do)
+    """
+    pa = _pyarrow()
+    files = _part_files(directory)
+    if len(files) < 2:
+        return 0
+    table = pa.concat_tables([pa.parquet.read_table(path, schema=archive_schema()) for path in files])
+    _write_part(table.sort_by('posted_time'), directory)
+    for path in files:
+        os.remove(path)
+    print(f"🗜️ Compacted {len(files)} files ({table.num_rows} jobs) in {directory}")
+    return len(files)
+
+def compact_archive(archive_dir=None, min_files=2):
+    """
+    Compact every partition with at least `min_files` part files.
+
+    Returns:
+        int: number of partitions compacted
+    """
+    root = archive_dir or ARCHIVE_DIR
+    compacted = 0
+    if not os.path.isdir(root):
+        return compacted
+    for query_dir in sorted(os.listdir(root)):
+        query_path = os.path.join(root, query_dir)
+        if not os.path.isdir(query_path):
+            continue
+        for date_dir in sorted(os.listdir(query_path)):
+            directory = os.path.join(query_path, date_dir)
+            if os.path.isdir(directory) and len(_part_files(directory)) >= min_files:
+                compact_partition(directory)
+                compacted += 1
+    return compacted
+
+def read_archive(search_queries=None, start_date=None, end_date=None, columns=None, where=None, archive_dir=None):
+    """
+    Read archived jobs, touching only the partitions and columns asked for.
+
+    Args:
+        search_queries (list): queries to read (all when None)
+        start_date (date): first scrape date to include
+        end_date (date): last scrape date to include
+        columns (list): archive columns to load, e.g. ['title', 'hour_rate_low_usd'];
+                        the partition columns search_query / scrape_date may be included
+        where: extra pyarrow.dataset expression, e.g. ds.field('client_spent_usd') >= 10000
+        archive_dir (str): archive root (JOB_ARCHIVE_DIR when omitted)
+
+    Returns:
+        pd.DataFrame: matching jobs
+    """
+    pa = _pyarrow()
+    ds = pa.dataset
+    root = archive_dir or ARCHIVE_DIR
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or list(archive_schema().names))
+
+    dataset = ds.dataset(
+        root, format='parquet', partitioning=_partitioning(),
+        schema=pa.unify_schemas([archive_schema(), _partitioning().schema])
+    )
+
+    expression = None
+    conditions = []
+    if search_queries is not None:
+        conditions.append(ds.field('search_query').isin(list(search_queries)))
+    if start_date is not None:
+        conditions.append(ds.field('scrape_date') >= pa.scalar(_as_date(start_date), pa.date32()))
+    if end_date is not None:
+        conditions.append(ds.field('scrape_date') <= pa.scalar(_as_date(end_date), pa.date32()))
+    if where is not None:
+        conditions.append(where)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+if __name__ == "__main__":
+    # Compact the whole archive:
+    #   python job_archive.py compact [--min-files N]
+    args = sys.argv[1:]
+    if args[:1] == ['compact']:
+        min_files = int(args[args.index('--min-files') + 1]) if '--min-files' in args else 2
+        print(f"Compacted {compact_archive(min_files=min_files)} partition(s)")
+    else:
+        print("usage: python job_archive.py compact [--min-files N]")
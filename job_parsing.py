@@ -0,0 +1,537 @@
+import re
+import sys
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+
+UPWORK_BASE_URL = "https://www.upwork.com/"
+
+# Elements that start a new line in the browser's innerText
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+
+def parse_posted_time(text):
+    """
+    Convert Upwork's relative "Posted ..." text to a datetime.
+
+    Handles "just now", "yesterday", "last week" and "<n>|a|an <unit> ago"
+    for seconds, minutes, hours, days, weeks, months and years.
+    Unknown text maps to now.
+    """
+    now = datetime.now()
+    text = text.lower().strip()
+    if 'just now' in text or 'moments ago' in text:
+        return now
+    if 'yesterday' in text:
+        return now - timedelta(days=1)
+    if 'last week' in text:
+        return now - timedelta(weeks=1)
+    if 'last month' in text:
+        return now - timedelta(days=30)
+
+    number = re.search(r'\d+', text)
+    if number:
+        amount = int(number.group())
+    elif re.search(r'\ban?\b', text):
+        amount = 1
+    else:
+        return now
+
+    if 'second' in text:
+        return now - timedelta(seconds=amount)
+    elif 'minute' in text:
+        return now - timedelta(minutes=amount)
+    elif 'hour' in text:
+        return now - timedelta(hours=amount)
+    elif 'day' in text:
+        return now - timedelta(days=amount)
+    elif 'week' in text:
+        return now - timedelta(weeks=amount)
+    elif 'month' in text:
+        return now - timedelta(days=30 * amount)
+    elif 'year' in text:
+        return now - timedelta(days=365 * amount)
+    return now
+
+def parse_exact_timestamp(value):
+    """
+    Parse an exact timestamp to naive local time, or None.
+
+    Accepts ISO-8601 text (e.g. a <time datetime=...>) and the epoch numbers
+    the search API sometimes sends for publishTime/createdOn, in seconds or
+    milliseconds.
+    """
+    if not value or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return parse_exact_timestamp(int(value))
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+# CSS selectors for the fields of one job card (relative to its <article>)
+JOB_CARD_SELECTORS = {
+    'title': 'h2.job-tile-title a',
+    'tags': 'div.air3-token-container button',
+    'spent': 'ul.d-flex.align-items-center.flex-wrap.text-light.gap-wide.text-base-sm.mb-4 li:nth-child(3) > div',
+    'payment': 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(3)',
+    'payment_verified': 'ul.d-flex.align-items-center.flex-wrap.text-light.gap-wide.text-base-sm.mb-4 li:nth-child(1) > div',
+    'description': 'p.mb-0.text-body-sm',
+    'posted_text': 'div.job-tile-header small > span:nth-child(2)',
+    'posted_exact': 'div.job-tile-header time[datetime], div.job-tile-header small [title]',
+    'budget_part1': 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(1) > strong',
+    'budget_part2': 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(2) > strong',
+}
+
+def card_posted_time(card):
+    """Posted time of a raw card: the exact timestamp when present, else the relative text."""
+    exact = parse_exact_timestamp(card.get('posted_exact'))
+    if exact is not None:
+        return exact
+    posted_text = card.get('posted_text')
+    return parse_posted_time(posted_text) if posted_text else datetime.now()
+
+# Upwork's job id inside a job link, e.g. ".../jobs/Build-ETL_~021234567890123456789/"
+JOB_KEY_PATTERN = re.compile(r'~0[0-9a-z]+', re.IGNORECASE)
+
+def job_key_from_link(link):
+    """Upwork job id ("~02...") of a job link, or None when the link has none."""
+    if not link:
+        return None
+    match = JOB_KEY_PATTERN.search(link)
+    return match.group(0).lower() if match else None
+
+def canonical_job_link(link):
+    """
+    One link per posting however it was reached: "https://www.upwork.com/jobs/~02..."
+    built from the job id, so the slugged results-page link and the search
+    API's ciphertext link agree. Links without a job id just lose their query
+    string. The database side uses the same rule through the
+    published.canonical_job_link(link) SQL function.
+    """
+    if not link:
+        return link
+    job_key = job_key_from_link(link)
+    if job_key:
+        return urljoin(UPWORK_BASE_URL, f"jobs/{job_key}")
+    return link.split('?', 1)[0]
+
+def cards_fingerprint(cards):
+    """
+    Fingerprint of the top cards of a results page: their links, plus exact
+    posted timestamps when the page has them. Relative "x minutes ago" text is
+    left out because it changes between runs without anything new being posted.
+
+    Returns:
+        str: hex digest, or None when there are no cards
+    """
+    if not cards:
+        return None
+    digest = hashlib.sha1()
+    for card in cards:
+        digest.update(f"{card.get('link') or ''}|{card.get('posted_exact') or ''}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# JobRecord attributes a client can edit after posting; content_hash covers these.
+# Client spend and payment verification change on their own, so they are left out.
+CONTENT_HASH_FIELDS = (
+    'title', 'description', 'tags', 'budget_type',
+    'lower_hourly_rate', 'higher_hourly_rate', 'fixed_price'
+)
+
+def _normalize_content(value):
+    if value is None or value == "N/A":
+        return ''
+    return ' '.join(str(value).split())
+
+def content_hash(fields):
+    """
+    Hash of the editable content of one job, stable across re-scrapes:
+    whitespace is collapsed, "N/A" counts as empty and tag order is ignored.
+
+    Args:
+        fields (dict): CONTENT_HASH_FIELDS attribute -> value
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha1()
+    for name in CONTENT_HASH_FIELDS:
+        value = fields.get(name)
+        if name == 'tags' and value:
+            value = ', '.join(sorted(tag.strip() for tag in str(value).split(',') if tag.strip()))
+        digest.update(f"{_normalize_content(value)}\x1f".encode('utf-8'))
+    return digest.hexdigest()
+
+# JobRecord attribute -> column name used by the DataFrame, CSV and raw JSON
+JOB_RECORD_COLUMNS = {
+    'search_query': 'Search Query',
+    'title': 'Title',
+    'job_link': 'Job Link',
+    'tags': 'Tags',
+    'client_spent': 'Client Spent',
+    'payment_info': 'Payment Info',
+    'budget_type': 'Budget Type',
+    'lower_hourly_rate': 'Lower Hourly Rate',
+    'higher_hourly_rate': 'Higher Hourly Rate',
+    'fixed_price': 'Fixed Price',
+    'payment_verified': 'Payment Verified/Unverified',
+    'description': 'Description',
+    'posted_time': 'Posted Time',
+}
+
+@dataclass
+class JobRecord:
+    """One scraped job. Kept typed in memory; serialised only for raw storage."""
+    __slots__ = tuple(JOB_RECORD_COLUMNS)
+
+    search_query: str
+    title: str
+    job_link: str
+    tags: str
+    client_spent: str
+    payment_info: str
+    budget_type: str
+    lower_hourly_rate: str
+    higher_hourly_rate: str
+    fixed_price: str
+    payment_verified: str
+    description: str
+    posted_time: datetime
+
+    def to_dict(self):
+        """The record as a column-name dict, with Posted Time formatted as text."""
+        record = {name: getattr(self, attr) for attr, name in JOB_RECORD_COLUMNS.items()}
+        record['Posted Time'] = self.posted_time.strftime('%Y-%m-%d %H:%M:%S')
+        return record
+
+    def content_hash(self):
+        """See content_hash()."""
+        return content_hash({name: getattr(self, name) for name in CONTENT_HASH_FIELDS})
+
+def jobs_to_columns(jobs):
+    """
+    Columnar view of job records for pandas.
+
+    Returns:
+        dict: column name -> list of values (Posted Time stays a datetime)
+    """
+    return {name: [getattr(job, attr) for job in jobs] for attr, name in JOB_RECORD_COLUMNS.items()}
+
+def jobs_to_json(jobs):
+    """Serialise job records for raw storage (the only place they become JSON)."""
+    return json.dumps([job.to_dict() for job in jobs], ensure_ascii=False, default=str)
+
+def build_job_record(card, search_query):
+    """
+    Turn the raw fields of one job card into a JobRecord.
+
+    Args:
+        card (dict): field name -> text (None when missing), as returned by
+                     EXTRACT_JOB_CARDS_JS
+        search_query (str): query the card was found under
+
+    Returns:
+        JobRecord: job record
+    """
+    title = card.get('title') or "N/A"
+    job_link = canonical_job_link(card.get('link')) or "N/A"
+    tags = ', '.join(card.get('tags') or [])
+    spent = card.get('spent') or "N/A"
+    payment = card.get('payment') or "N/A"
+    payment_verified = card.get('payment_verified') or "N/A"
+    description = card.get('description') or "N/A"
+
+    posted_time = card_posted_time(card)
+
+    # Budget Type comes from two different selectors
+    budget_parts = [part for part in (card.get('budget_part1'), card.get('budget_part2')) if part]
+    budget_raw = ' '.join(budget_parts) if budget_parts else "N/A"
+
+    # Parse Budget Type and extract hourly rates
+    lower_hourly_rate = "N/A"
+    higher_hourly_rate = "N/A"
+    fixed_price = "N/A"
+    budget_type = budget_raw
+
+    if budget_raw != "N/A":
+        rate_pattern = r'\$(\d+\.?\d*)\s*-\s*\$(\d+\.?\d*)'
+        rate_match = re.search(rate_pattern, budget_raw)
+
+        if rate_match:
+            lower_hourly_rate = f"${rate_match.group(1)}"
+            higher_hourly_rate = f"${rate_match.group(2)}"
+            budget_type = re.sub(rate_pattern, '', budget_raw).strip()
+            # "Hourly: $25.00 - $45.00" with no experience level leaves "Hourly:"
+            budget_type = ' '.join(budget_type.split()).rstrip(':') or "N/A"
+
+    if "Fixed price" in budget_type and payment != "N/A":
+        price_pattern = r'\$(\d+(?:\.\d{2})?)'
+        price_match = re.search(price_pattern, payment)
+        if price_match:
+            fixed_price = f"${price_match.group(1)}"
+
+    return JobRecord(
+        search_query=search_query,
+        title=title,
+        job_link=job_link,
+        tags=tags,
+        client_spent=spent,
+        payment_info=payment,
+        budget_type=budget_type,
+        lower_hourly_rate=lower_hourly_rate,
+        higher_hourly_rate=higher_hourly_rate,
+        fixed_price=fixed_price,
+        payment_verified=payment_verified,
+        description=description,
+        posted_time=posted_time.replace(microsecond=0)
+    )
+
+def _inner_text(element):
+    """Approximate the browser's innerText: block elements break lines, whitespace collapses."""
+    parts = []
+
+    def add(text):
+        # Source newlines are plain whitespace; only block elements break lines
+        if text:
+            parts.append(re.sub(r'\s+', ' ', text))
+
+    def walk(el):
+        tag = el.tag if isinstance(el.tag, str) else ''
+        if tag in ('script', 'style', 'template'):
+            add(el.tail)
+            return
+        block = tag in _BLOCK_TAGS
+        if block:
+            parts.append('\n')
+        add(el.text)
+        for child in el:
+            walk(child)
+        if block:
+            parts.append('\n')
+        if el is not element:
+            add(el.tail)
+
+    walk(element)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def parse_job_cards_html(html):
+    """
+    Parse the job cards of a search-results HTML page (e.g. driver.page_source
+    or a saved snapshot) with lxml, using JOB_CARD_SELECTORS.
+
+    Returns:
+        list: raw card dicts, same shape as the browser-side extraction
+    """
+    from lxml import html as lxml_html
+
+    root = lxml_html.fromstring(html)
+    first = root.cssselect('section > article')
+    if not first:
+        return []
+
+    def text(card, css):
+        found = card.cssselect(css)
+        return _inner_text(found[0]) if found else None
+
+    cards = []
+    for card in first[0].getparent().iterchildren('article'):
+        link = card.cssselect(JOB_CARD_SELECTORS['title'])
+        href = link[0].get('href') if link else None
+        fields = {
+            'title': _inner_text(link[0]) if link else None,
+            'link': urljoin(UPWORK_BASE_URL, href) if href else None,
+            'tags': [t for t in (_inner_text(b) for b in card.cssselect(JOB_CARD_SELECTORS['tags'])) if t]
+        }
+        for name in ('spent', 'payment', 'payment_verified', 'description',
+                     'posted_text', 'budget_part1', 'budget_part2'):
+            fields[name] = text(card, JOB_CARD_SELECTORS[name])
+        exact = card.cssselect(JOB_CARD_SELECTORS['posted_exact'])
+        fields['posted_exact'] = (exact[0].get('datetime') or exact[0].get('title')) if exact else None
+        cards.append(fields)
+    return cards
+
+def parse_search_results_html(html, search_query, last_scrape_time=None):
+    """
+    Pure, browser-free version of the page extraction: HTML in, JobRecords out.
+
+    Cards at or before `last_scrape_time` (and everything after them, since
+    results are sorted by recency) are dropped.
+
+    Returns:
+        list: JobRecords
+    """
+    jobs = []
+    for card in parse_job_cards_html(html):
+        if last_scrape_time and card_posted_time(card) <= last_scrape_time:
+            break
+        jobs.append(build_job_record(card, search_query))
+    return jobs
+
+# Keys that mark a dict inside a search API payload as one job posting
+_POSTING_KEYS = ('ciphertext', 'jobTile', 'publishedOn', 'publishTime', 'createdOn')
+
+def _lookup(node, *paths):
+    """First non-empty value among dotted `paths` in a nested dict."""
+    for path in paths:
+        value = node
+        for key in path.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value not in (None, '', []):
+            return value
+    return None
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _compact_money(amount):
+    # Same shape as the card text, e.g. 60000 -> "60K+"
+    if amount >= 1_000_000:
+        return f"{amount / 1_000_000:g}M+"
+    if amount >= 1_000:
+        return f"{int(amount // 1_000)}K+"
+    return f"{int(amount)}"
+
+# Search API experience level -> the card's text for it
+_CONTRACTOR_TIERS = {
+    '1': 'Entry level', 'ENTRYLEVEL': 'Entry level', 'ENTRY_LEVEL': 'Entry level',
+    '2': 'Intermediate', 'INTERMEDIATELEVEL': 'Intermediate', 'INTERMEDIATE': 'Intermediate',
+    '3': 'Expert', 'EXPERTLEVEL': 'Expert', 'EXPERT': 'Expert',
+}
+
+def _iter_job_postings(node):
+    if isinstance(node, dict):
+        if 'title' in node and any(key in node for key in _POSTING_KEYS):
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_job_postings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_job_postings(value)
+
+def _card_from_posting(posting):
+    ciphertext = _lookup(posting, 'ciphertext', 'jobTile.job.ciphertext', 'jobTile.job.cipherText')
+    skills = _lookup(posting, 'attrs', 'ontologySkills', 'skills') or []
+    job_type = str(_lookup(posting, 'jobTile.job.jobType', 'jobType', 'type') or '').upper()
+    hourly_min = _lookup(posting, 'hourlyBudget.min', 'hourlyBudgetMin', 'jobTile.job.hourlyBudgetMin')
+    hourly_max = _lookup(posting, 'hourlyBudget.max', 'hourlyBudgetMax', 'jobTile.job.hourlyBudgetMax')
+    fixed_amount = _lookup(posting, 'amount.amount', 'fixedPriceAmount.amount', 'jobTile.job.fixedPriceAmount.amount')
+    verified = _lookup(posting, 'client.paymentVerificationStatus',
+                       'upworkHistoryData.client.paymentVerificationStatus')
+    spent = _to_number(_lookup(posting, 'client.totalSpent.amount', 'client.totalSpent',
+                               'upworkHistoryData.client.totalSpent.amount'))
+    tier = _lookup(posting, 'jobTile.job.contractorTier', 'contractorTier', 'tierText', 'tier')
+
+    budget_part1 = None
+    payment = None
+    if job_type in ('HOURLY', '2'):
+        budget_part1 = "Hourly"
+        if hourly_min and hourly_max:
+            budget_part1 = f"Hourly: ${float(hourly_min):.2f} - ${float(hourly_max):.2f}"
+    elif job_type in ('FIXED', '1'):
+        budget_part1 = "Fixed price"
+        if fixed_amount:
+            payment = f"Est. budget: ${float(fixed_amount):.2f}"
+
+    return {
+        'title': posting.get('title'),
+        'link': canonical_job_link(urljoin(UPWORK_BASE_URL, f"jobs/{ciphertext}")) if ciphertext else None,
+        'tags': [t for t in ((s.get('prettyName') or s.get('name') or s.get('prefLabel'))
+                             if isinstance(s, dict) else s for s in skills) if t],
+        'spent': f"${_compact_money(spent)}\nspent" if spent is not None else None,
+        'payment': payment,
+        'payment_verified': None if verified is None else (
+            "Payment verified" if str(verified).upper() in ('1', 'VERIFIED') else "Payment unverified"),
+        'description': posting.get('description'),
+        'posted_text': None,
+        'posted_exact': _lookup(posting, 'publishTime', 'publishedOn', 'jobTile.job.publishTime',
+                                'createTime', 'createdOn', 'jobTile.job.createTime'),
+        'budget_part1': budget_part1,
+        'budget_part2': _CONTRACTOR_TIERS.get(str(tier).upper(), tier) if tier is not None else None,
+        'job_id': ciphertext
+    }
+
+def cards_from_search_payloads(payloads):
+    """
+    Build raw card dicts (same shape as the DOM extraction) from the JSON
+    payloads the search page fetches. Postings are found anywhere in the
+    payload; each job appears once, in payload order.
+
+    Returns:
+        list: raw card dicts
+    """
+    cards = []
+    seen = set()
+    for payload in payloads:
+        for posting in _iter_job_postings(payload):
+            card = _card_from_posting(posting)
+            key = card['job_id'] or card['title']
+            if key in seen:
+                continue
+            seen.add(key)
+            cards.append(card)
+    return cards
+
+def _parse_page(args):
+    html, search_query = args
+    return parse_search_results_html(html, search_query)
+
+def parse_html_pages(pages, search_query, workers=None):
+    """
+    Parse several saved results pages, in parallel processes when `workers` > 1.
+
+    Returns:
+        list: one list of JobRecords per page, in input order
+    """
+    if not workers or workers <= 1:
+        return [parse_search_results_html(html, search_query) for html in pages]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_page, [(html, search_query) for html in pages]))
+
+if __name__ == "__main__":
+    # Benchmark against saved HTML snapshots:
+    #   python job_parsing.py page1.html [page2.html ...] [--workers N]
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    pages = []
+    for path in args:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+    started = time.perf_counter()
+    results = parse_html_pages(pages, 'benchmark', workers=workers)
+    elapsed = time.perf_counter() - started
+    cards = sum(len(r) for r in results)
+    print(f"Parsed {len(pages)} page(s), {cards} job cards in {elapsed * 1000:.1f} ms "
+          f"({elapsed * 1000 / max(cards, 1):.2f} ms/card)")
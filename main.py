@@ -1,106 +1,382 @@
 import sys
-import json
-from upwork_scraping import scrape_upwork_jobs, json_to_dataframe, wait_until_found_and_click
+import time
+import argparse
+from contextlib import ExitStack
+from upwork_scraping import (
+    scrape_upwork_jobs,
+    stream_upwork_jobs,
+    json_to_dataframe,
+    start_logged_in_session
+)
 from database_operation import (
     get_search_queries_from_db,
     get_source_info,
     insert_jobs_into_public_job,
     read_last_scrape_time,
+    update_scrape_time,
     insert_raw_json_data,
-    insert_df_into_staging_lead,
-    get_max_lead_id,
-    insert_df_into_staging_client,
-    insert_df_into_staging_tag,
+    insert_df_into_staging,
     process_all_staging_to_published,
-    mark_current_practice_processed,
-    reset_practice_status_if_none_active
+    lock_promotion_watermark,
+    mark_practice_processed,
+    reset_practice_status_if_none_active,
+    claim_practice_row,
+    release_practice_lease,
+    practice_lease_heartbeat,
+    default_worker_id,
+    ensure_schema,
+    PRACTICE_LEASE_SECONDS,
+    get_seen_jobs,
+    record_job_queries,
+    update_changed_leads,
+    db_connection,
+    after_commit,
+    close_connection_pool
 
 )
+from db_writer import DBWriter
+from job_parsing import job_key_from_link
+from job_archive import archive_jobs
 
 
 from datetime import datetime
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-def main():
+def record_seen_jobs(jobs=(), conn=None):
+    """
+    Write the (job, search query) associations of `jobs` and of the cards
+    skipped as already captured under another query, and apply the edits
+    found among those cards (update_changed_leads). Once the transaction
+    commits, `jobs` and the edits join the seen-job index with their new
+    hashes; if it rolls back, the skipped cards are queued again for the
+    next write.
+
+    Returns:
+        int: Number of new associations
+    """
+    seen_jobs = get_seen_jobs()
+    skipped, edits = seen_jobs.drain()
+    rows = [(job_key_from_link(job.job_link), job.search_query, job.job_link) for job in jobs]
+    deferred = False
     try:
-        # Check if there are any search queries to process
-        search_queries = get_search_queries_from_db()
-        
-        if not search_queries:
-            print("No search queries found with status 0")
-            return
-        
-        print(f"Processing search query: {search_queries['search_criteria']}")
-       
- 
-        # CHECK THE TIME FILTER - This might be the problem!
-        last_time = read_last_scrape_time(search_queries["search_criteria"])
-        print(f"Last scrape time: {last_time}")
-        print(f"Current time: {datetime.now()}")
-        
-        # Execute the scraping process
-        print("Starting scraping...")
-        json_result = scrape_upwork_jobs()
-        
-        # Check if we got data
-        print(f"JSON result length: {len(json_result)}")
-        
-        # Convert JSON to clean DataFrame
-        df = json_to_dataframe(json_result)
-        print(f"DataFrame created with {len(df)} rows")
-
-        # Get source_id and source_name
-        source_info = get_source_info()
-
-        # Insert jobs into public.job
-        insert_jobs_into_public_job(df, source_info, search_queries["search_criteria"])
-        print("data inserted into public.job")
+        with db_connection(conn) as conn:
+            added = record_job_queries(rows + skipped, conn=conn)
+            if edits:
+                # Newest first: json_to_dataframe keeps the first row per link
+                update_changed_leads(json_to_dataframe(edits[::-1]), conn=conn)
+            hashes = {job_key_from_link(job.job_link): job.content_hash() for job in [*jobs, *edits]}
+            after_commit(conn, lambda: seen_jobs.add(hashes), lambda: seen_jobs.requeue(skipped, edits))
+            deferred = True
+    except Exception:
+        if not deferred:
+            seen_jobs.requeue(skipped, edits)
+        raise
+    if skipped:
+        print(f"🔗 Linked {len(skipped)} already captured job(s) to their new search queries"
+              + (f", {len(edits)} edited" if edits else ""))
+    return added
+
+def archive_scraped_jobs(df, search_query):
+    """Append a batch DataFrame to the Parquet archive (see job_archive); a failure only logs a warning."""
+    if df.empty:
+        return
+    try:
+        archive_jobs(df, search_query)
+    except Exception as e:
+        print(f" ⚠️ Could not archive {len(df)} jobs for '{search_query}': {e}")
+
+def persist_jobs(jobs, source_info=None, conn=None, job_id=None):
+    """
+    Push one batch of scraped jobs through raw, staging and published, under
+    the public.job run record `job_id`, and append it to the Parquet archive
+    once the transaction commits.
+
+    Args:
+        jobs (list): JobRecords
+        source_info (dict): source row (looked up when omitted)
+        conn: Optional existing connection (see db_connection)
+        job_id (int): public.job id returned by insert_jobs_into_public_job
+
+    Returns:
+        pd.DataFrame: the batch as a DataFrame
+    """
+    # Convert the job records to a clean DataFrame
+    df = json_to_dataframe(jobs)
+    print(f"DataFrame created with {len(df)} rows")
+
+    with db_connection(conn) as conn:
+        # Archived from the frame the DB write uses, once the write has committed:
+        # a rolled-back batch is scraped again and must not land in the archive twice
+        search_query = jobs[0].search_query if jobs else None
+        after_commit(conn, lambda: archive_scraped_jobs(df, search_query))
 
-         # Insert raw JSON data using the latest job ID from public.job
-        job_id = insert_raw_json_data(json_result)
-        
-        if job_id:
-            print(f"Raw JSON data inserted successfully with job_id: {job_id}")
+        source_info = source_info or get_source_info(conn=conn)
+        source_id = source_info["source_id"] if source_info else 1
+
+        # Insert raw JSON data under this run's public.job record (serialised here, once)
+        raw_id = insert_raw_json_data(jobs, conn=conn, job_id=job_id)
+
+        if raw_id:
+            print(f"Raw JSON data inserted successfully with raw_id {raw_id} for job_id: {job_id}")
         else:
             print("Failed to insert raw JSON data")
-        
-        # Get max lead_id before lead insertion
-        max_lead_id_before = get_max_lead_id()
-        print(f"Max lead_id before lead insertion: {max_lead_id_before}")
-
-         # Insert DataFrame into staging.lead using latest raw_id
-        raw_id = insert_df_into_staging_lead(df)
-        
-        if raw_id:
-            print(f"DataFrame data inserted into staging.lead successfully with raw_id: {raw_id}")
+
+        # Held until commit: no other writer can promote past our uncommitted staging rows
+        lock_promotion_watermark(source_id, conn=conn)
+
+        # Insert DataFrame into staging.lead, then client/tag rows keyed by the returned lead_ids
+        staging_result = insert_df_into_staging(df, conn=conn, raw_id=raw_id)
+        lead_ids = staging_result['lead_ids']
+
+        if lead_ids:
+            print(f"DataFrame data inserted into staging.lead successfully. {len(lead_ids)} leads added.")
+        elif staging_result['known_skipped'] == len(df) and len(df) > 0:
+            print("No new leads - every job is already published")
         else:
             print("Failed to insert DataFrame into staging.lead")
 
-        # Insert DataFrame into staging.client using new leads only
-        client_count = insert_df_into_staging_client(df, max_lead_id_before)
-        
+        if staging_result['leads_updated']:
+            print(f"Updated {staging_result['leads_updated']} edited leads in published.lead")
+
+        client_count = staging_result['clients_inserted']
+
         if client_count > 0:
             print(f"Client data inserted into staging.client successfully. {client_count} records added.")
         else:
             print("No client data inserted - no new leads found")
 
-        # Insert DataFrame into staging.tag using new leads only
-        tag_count = insert_df_into_staging_tag(df, max_lead_id_before)
+        tag_count = staging_result['tags_inserted']
 
         if tag_count > 0:
             print(f"Tag data inserted into staging.tag successfully. {tag_count} records added.")
         else:
             print("No tag data inserted - no new leads found")
 
-        result = process_all_staging_to_published()
-        print("data is inserted into published")     
+        process_all_staging_to_published(conn=conn, source_id=source_id)
+        print("data is inserted into published")
 
+        record_seen_jobs(jobs, conn=conn)
 
-        mark_current_practice_processed()
-    
-        reset_practice_status_if_none_active()
+    return df
+
+def _write_search_query(jobs, search_queries, reset_when_done=True, worker_id=None,
+                        fingerprint=None, scraped_at=None):
+    """
+    DB half of process_search_query: one transaction covering the public.job
+    run record, raw, staging and published, then the query's scrape time
+    (`scraped_at`, with the top-cards `fingerprint`) and the practice row status.
+
+    With no jobs (every card older than the watermark or already captured)
+    there is no run record or raw row, as in the streaming path: see
+    _mark_unchanged_query.
+
+    Returns:
+        pd.DataFrame: the written jobs
+    """
+    if not jobs:
+        return _mark_unchanged_query(search_queries, reset_when_done, worker_id, fingerprint, scraped_at)
+
+    # Reuse one pooled connection (single transaction) for all DB writes of this run
+    with db_connection() as conn:
+        # Insert the job run into public.job
+        source_info = get_source_info(conn=conn)
+        job_id = insert_jobs_into_public_job(None, source_info, search_queries["search_criteria"], conn=conn)
+        print("data inserted into public.job")
+
+        df = persist_jobs(jobs, source_info, conn=conn, job_id=job_id)
+
+        update_scrape_time(search_queries["search_criteria"], conn=conn,
+                           fingerprint=fingerprint, scraped_at=scraped_at)
+        mark_practice_processed(search_queries["id"], worker_id=worker_id, conn=conn)
+
+        if reset_when_done:
+            reset_practice_status_if_none_active(conn=conn)
+
+    return df
+
+def _mark_unchanged_query(search_queries, reset_when_done=True, worker_id=None,
+                          fingerprint=None, scraped_at=None):
+    """
+    DB half of process_search_query when the "nothing new" check short-circuited
+    the scrape or it found no new jobs: no run record or job data, only the
+    associations of already captured cards, the scrape time and the practice
+    row status.
+
+    Returns:
+        pd.DataFrame: empty jobs DataFrame
+    """
+    with db_connection() as conn:
+        record_seen_jobs(conn=conn)
+        update_scrape_time(search_queries["search_criteria"], conn=conn,
+                           fingerprint=fingerprint, scraped_at=scraped_at)
+        mark_practice_processed(search_queries["id"], worker_id=worker_id, conn=conn)
+
+        if reset_when_done:
+            reset_practice_status_if_none_active(conn=conn)
+
+    return json_to_dataframe([])
+
+def process_search_query(search_queries, driver=None, reset_when_done=True, worker_id=None, writer=None):
+    """
+    Scrape one practice row and push its jobs through raw, staging and published.
+
+    Args:
+        search_queries (dict): practice row ({"id", "search_criteria"})
+        driver: logged-in driver to reuse (a new session is started when omitted)
+        reset_when_done (bool): reset practice statuses once none is pending
+        worker_id (str): lease holder; the row is only marked processed while
+                         this worker still holds its lease
+        writer (DBWriter): when given, the DB writes are queued on it and the
+                           browser is free for the next query straight away
+
+    Returns:
+        pd.DataFrame: the scraped jobs, or a Future of it when `writer` is given
+    """
+    print(f"Processing search query: {search_queries['search_criteria']}")
+
+
+    # CHECK THE TIME FILTER - This might be the problem!
+    last_time = read_last_scrape_time(search_queries["search_criteria"])
+    print(f"Last scrape time: {last_time}")
+    print(f"Current time: {datetime.now()}")
+
+    # Execute the scraping process
+    print("Starting scraping...")
+    scrape_state = {}
+    jobs = scrape_upwork_jobs(search_queries, driver=driver, state=scrape_state)
+
+    # Check if we got data
+    print(f"Scraped {len(jobs)} job records")
+
+    # The scrape time only advances in the transaction that stores the jobs
+    watermark = (scrape_state.get('fingerprint'), scrape_state.get('scraped_at'))
+    if scrape_state.get('unchanged'):
+        # Nothing new since the previous run: skip raw, staging and published
+        task, args = _mark_unchanged_query, (search_queries, reset_when_done, worker_id, *watermark)
+    else:
+        task, args = _write_search_query, (jobs, search_queries, reset_when_done, worker_id, *watermark)
+
+    if writer is None:
+        return task(*args)
+    return writer.submit(task, *args)
+
+def _start_job_run(search_criteria):
+    """
+    Insert the public.job run record that a streamed query's pages are stored under.
+
+    Returns:
+        tuple: (source_info, public.job id)
+    """
+    with db_connection() as conn:
+        source_info = get_source_info(conn=conn)
+        job_id = insert_jobs_into_public_job(None, source_info, search_criteria, conn=conn)
+        print("data inserted into public.job")
+    return source_info, job_id
+
+def _persist_page(page_jobs, job_run):
+    """Writer task for one streamed page, stored under the run that the `job_run` Future created."""
+    source_info, job_id = job_run.result()
+    return persist_jobs(page_jobs, source_info, job_id=job_id)
+
+def _finish_streamed_query(search_queries, page_futures, job_count, fingerprint=None,
+                           reset_when_done=True, worker_id=None, scraped_at=None):
+    """
+    Last task of a streamed query. The writer runs tasks in order, so every
+    page future is already resolved here; the watermark (`scraped_at`, taken
+    before the first page was requested, with the top-cards `fingerprint`)
+    and practice row are only updated when all of them succeeded.
+    """
+    search_criteria = search_queries["search_criteria"]
+    for future in page_futures:
+        if future.exception() is not None:
+            raise RuntimeError(f"Writing pages for '{search_criteria}' failed: {future.exception()}") from future.exception()
+
+    print(f"🌊 Streamed {job_count} jobs in {max(len(page_futures) - 1, 0)} page(s) for '{search_criteria}'")
+
+    with db_connection() as conn:
+        # Associations from pages where every card was already captured
+        record_seen_jobs(conn=conn)
+        update_scrape_time(search_criteria, conn=conn, fingerprint=fingerprint, scraped_at=scraped_at)
+        mark_practice_processed(search_queries["id"], worker_id=worker_id, conn=conn)
+
+        if reset_when_done:
+            reset_practice_status_if_none_active(conn=conn)
+
+    return job_count
+
+def process_search_query_streaming(search_queries, driver=None, reset_when_done=True, worker_id=None, writer=None):
+    """
+    Streaming variant of process_search_query: every results page is queued
+    on a DBWriter that commits it to raw, staging and published while the
+    browser moves on to the next page. Memory stays bounded by the writer's
+    queue, and pages already committed survive a crash later in the run.
 
+    The query's last scrape time and the practice row are only updated once
+    every page has been written, so a failed run is scraped again from the
+    old watermark (published inserts skip links that already landed).
+
+    Args:
+        search_queries (dict): practice row ({"id", "search_criteria"})
+        driver: logged-in driver to reuse (a new session is started when omitted)
+        reset_when_done (bool): reset practice statuses once none is pending
+        worker_id (str): lease holder, as for process_search_query
+        writer (DBWriter): shared writer; its final task may still be queued
+                           on return. A private writer is used and flushed
+                           when omitted.
+
+    Returns:
+        int: number of jobs written, or a Future of it when `writer` is given
+    """
+    search_criteria = search_queries["search_criteria"]
+    print(f"Streaming search query: {search_criteria}")
+
+    owns_writer = writer is None
+    if owns_writer:
+        writer = DBWriter(name="page-writer").start()
+
+    try:
+        page_futures = []
+        job_count = 0
+        scrape_state = {}
+        for page_jobs in stream_upwork_jobs(search_queries, driver=driver, state=scrape_state):
+            if any(f.done() and f.exception() is not None for f in page_futures):
+                print(f"⚠️ Stopping '{search_criteria}': a page failed to write")
+                break
+            if page_jobs:
+                # The run record is only created once there is something to store under it
+                if not page_futures:
+                    page_futures.append(writer.submit(_start_job_run, search_criteria))
+                # Blocks while the writer's queue is full
+                page_futures.append(writer.submit(_persist_page, page_jobs, page_futures[0]))
+                job_count += len(page_jobs)
+
+        done = writer.submit(_finish_streamed_query, search_queries, page_futures, job_count,
+                             scrape_state.get('fingerprint'), reset_when_done, worker_id,
+                             scrape_state.get('scraped_at'))
+    finally:
+        if owns_writer:
+            writer.close()
+
+    return done.result() if owns_writer else done
+
+def main(stream=False):
+    try:
+        ensure_schema()
+
+        # Check if there are any search queries to process
+        search_queries = get_search_queries_from_db()
+
+        if not search_queries:
+            print("No search queries found with status 0")
+            return
+
+        if stream:
+            job_count = process_search_query_streaming(search_queries)
+            print(f"Streamed {job_count} jobs successfully!")
+            return job_count
+
+        df = process_search_query(search_queries)
 
         # Display DataFrame information
         print(f"Scraped {len(df)} jobs successfully!")
@@ -108,7 +384,7 @@ def main():
         print("\nColumn Names:")
         for i, col in enumerate(df.columns, 1):
             print(f"{i}. {col}")
-        
+
         if len(df) > 0:
             print("\nFirst 3 rows:")
             print(df.head(3).to_string())
@@ -116,14 +392,211 @@ def main():
             print("\n DataFrame is EMPTY! This is the problem.")
             print("The time filter might be blocking all jobs.")
             print("Or Cloudflare might be blocking the scraper.")
-        
+
         return df
-        
+
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        close_connection_pool()
+
+def _record_result(result, stream, cleanup=None):
+    """
+    Done-callback for a query's write Future: fill in `result` (jobs or
+    error), run `cleanup(result)` and print the per-query summary line.
+    """
+    def callback(future):
+        try:
+            value = future.result()
+            result["jobs"] = value if stream else len(value)
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            if cleanup is not None:
+                cleanup(result)
+        print(f"📦 Query '{result['search_criteria']}' (id {result['id']}): "
+              + (f"{result['jobs']} jobs" if result["error"] is None else f"failed - {result['error']}"))
+    return callback
+
+def main_batch(limit=None, stream=False):
+    """
+    Drain up to `limit` pending practice rows (all when None) in one logged-in
+    browser session, so Chrome startup and login are paid once per batch.
+    DB writes run on a DBWriter thread while the browser scrapes the next row.
+    With `stream`, each row is written page by page (process_search_query_streaming).
+
+    Returns:
+        list: per-query result dicts (id, search_criteria, jobs, error)
+    """
+    results = []
+    processed_ids = set()
+    driver = None
+
+    try:
+        ensure_schema()
+        driver = start_logged_in_session()
+        get_seen_jobs(reset=True)
+
+        with DBWriter() as writer:
+            while limit is None or len(results) < limit:
+                # Rows already handed to the writer stay pending until their write lands
+                search_queries = get_search_queries_from_db(exclude_ids=processed_ids)
+
+                if not search_queries:
+                    print("No more search queries found with status 0")
+                    break
+                processed_ids.add(search_queries["id"])
+
+                print("="*60)
+                print(f"Batch query {len(results) + 1}{f'/{limit}' if limit else ''}")
+                result = {"id": search_queries["id"], "search_criteria": search_queries["search_criteria"], "jobs": 0, "error": None}
+                results.append(result)
+                try:
+                    if stream:
+                        future = process_search_query_streaming(search_queries, driver=driver, reset_when_done=False, writer=writer)
+                    else:
+                        future = process_search_query(search_queries, driver=driver, reset_when_done=False, writer=writer)
+                except Exception as e:
+                    result["error"] = str(e)
+                    import traceback
+                    traceback.print_exc()
+                    print(f"📦 Query '{result['search_criteria']}' (id {result['id']}): failed - {result['error']}")
+                    continue
+                future.add_done_callback(_record_result(result, stream))
+
+        reset_practice_status_if_none_active()
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        close_connection_pool()
+
+    print(f"🏁 Batch finished: {len(results)} queries processed, "
+          f"{sum(1 for r in results if r['error'])} failed")
+    return results
+
+def main_worker(limit=None, worker_id=None, lease_seconds=PRACTICE_LEASE_SECONDS, poll_interval=None, stream=False):
+    """
+    Worker mode: lease practice rows with SELECT ... FOR UPDATE SKIP LOCKED and
+    process them in one logged-in browser session. Any number of workers on
+    any number of hosts can run against the same queue.
+
+    DB writes run on a DBWriter thread while the browser scrapes the next
+    row; each row's lease heartbeat keeps running until its write has landed.
+
+    Args:
+        limit (int): stop after this many rows (None = no limit)
+        worker_id (str): lease holder name (hostname:pid by default)
+        lease_seconds (int): lease length, renewed by a heartbeat while scraping
+        poll_interval (float): seconds to wait for new work when the queue is
+                               empty; None exits instead
+        stream (bool): write each results page as soon as it is scraped
+
+    Returns:
+        list: per-query result dicts (id, search_criteria, jobs, error)
+    """
+    worker_id = worker_id or default_worker_id()
+    results = []
+    driver = None
+    print(f"👷 Starting worker {worker_id}")
+
+    try:
+        ensure_schema()
+        driver = start_logged_in_session()
+        get_seen_jobs(reset=True)
+
+        with DBWriter() as writer:
+            while limit is None or len(results) < limit:
+                search_queries = claim_practice_row(worker_id, lease_seconds)
+
+                if not search_queries:
+                    writer.flush()
+                    reset_practice_status_if_none_active()
+                    if poll_interval is None:
+                        print("No more search queries to lease")
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                print("="*60)
+                result = {"id": search_queries["id"], "search_criteria": search_queries["search_criteria"], "jobs": 0, "error": None}
+                results.append(result)
+
+                # Outlives this iteration: closed by the write's done-callback
+                lease = ExitStack()
+                lease.enter_context(practice_lease_heartbeat(search_queries["id"], worker_id, lease_seconds))
+
+                def cleanup(result, lease=lease, practice_id=search_queries["id"]):
+                    lease.close()
+                    if result["error"] is not None:
+                        release_practice_lease(practice_id, worker_id)
+
+                try:
+                    if stream:
+                        future = process_search_query_streaming(
+                            search_queries, driver=driver, reset_when_done=False, worker_id=worker_id, writer=writer
+                        )
+                    else:
+                        future = process_search_query(
+                            search_queries, driver=driver, reset_when_done=False, worker_id=worker_id, writer=writer
+                        )
+                except Exception as e:
+                    result["error"] = str(e)
+                    import traceback
+                    traceback.print_exc()
+                    cleanup(result)
+                    print(f"📦 Query '{result['search_criteria']}' (id {result['id']}): failed - {result['error']}")
+                    continue
+                future.add_done_callback(_record_result(result, stream, cleanup))
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        close_connection_pool()
+
+    print(f"🏁 Worker {worker_id} finished: {len(results)} queries processed, "
+          f"{sum(1 for r in results if r['error'])} failed")
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Upwork jobs for pending practice rows")
+    parser.add_argument("--batch", nargs="?", type=int, const=0, default=None, metavar="N",
+                        help="process N pending practice rows (all when N is omitted or 0) in one browser session")
+    parser.add_argument("--worker", action="store_true",
+                        help="lease practice rows (SKIP LOCKED) so several workers can share the queue")
+    parser.add_argument("--worker-id", default=None, help="lease holder name (default hostname:pid)")
+    parser.add_argument("--limit", type=int, default=None, help="worker mode: stop after N rows")
+    parser.add_argument("--lease-seconds", type=int, default=PRACTICE_LEASE_SECONDS,
+                        help="worker mode: lease length renewed by the heartbeat")
+    parser.add_argument("--poll", type=float, default=None, metavar="SECONDS",
+                        help="worker mode: wait for new rows instead of exiting when the queue is empty")
+    parser.add_argument("--stream", action="store_true",
+                        help="write each results page to the database as soon as it is scraped")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.worker:
+        main_worker(limit=args.limit, worker_id=args.worker_id,
+                    lease_seconds=args.lease_seconds, poll_interval=args.poll, stream=args.stream)
+    elif args.batch is None:
+        main(stream=args.stream)
+    else:
+        main_batch(limit=args.batch or None, stream=args.stream)
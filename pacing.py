@@ -0,0 +1,123 @@
+import os
+import random
+import time
+from collections import defaultdict
+from selenium.webdriver.support.ui import WebDriverWait
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Waits for the page's resource list to stop growing for `idle_ms`
+NETWORK_IDLE_JS = """
+const idleMs = arguments[0];
+const count = performance.getEntriesByType('resource').length;
+const now = performance.now();
+const state = window.__pacingIdle || {count: -1, since: now};
+if (state.count !== count) {
+    window.__pacingIdle = {count: count, since: now};
+    return false;
+}
+return document.readyState === 'complete' && now - state.since >= idleMs;
+"""
+
+class Pacer:
+    """
+    Event-driven waits plus a per-session politeness budget.
+
+    Readiness waits (DOM condition, document ready, network idle) return as
+    soon as the page is ready. The politeness budget only adds the delay
+    needed on top of that for anti-bot reasons: a minimum interval (plus
+    jitter) between navigations, and human pauses scaled by PACING_SCALE.
+    Every wait is timed per category so a run can report where it waited.
+
+    Environment:
+        PACING_SCALE: multiplier for human pauses (default 1.0, 0 disables them)
+        PACING_MIN_INTERVAL: minimum seconds between navigations (default 4)
+        PACING_JITTER: extra random seconds added to that interval (default 2)
+        PACING_TIMEOUT: default readiness timeout in seconds (default 20)
+    """
+
+    def __init__(self, scale=None, min_interval=None, jitter=None, timeout=None):
+        self.scale = float(os.getenv('PACING_SCALE', 1.0)) if scale is None else scale
+        self.min_interval = float(os.getenv('PACING_MIN_INTERVAL', 4)) if min_interval is None else min_interval
+        self.jitter = float(os.getenv('PACING_JITTER', 2)) if jitter is None else jitter
+        self.timeout = float(os.getenv('PACING_TIMEOUT', 20)) if timeout is None else timeout
+        self._last_navigation = None
+        self.start_run()
+
+    def start_run(self):
+        """Reset the per-run wait statistics."""
+        self.waited = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.run_started = time.perf_counter()
+
+    def _record(self, category, started):
+        self.waited[category] += time.perf_counter() - started
+        self.counts[category] += 1
+
+    def pause(self, min_s, max_s, category="human"):
+        """Random human pause, scaled by the politeness budget."""
+        started = time.perf_counter()
+        delay = random.uniform(min_s, max_s) * self.scale
+        if delay > 0:
+            time.sleep(delay)
+        self._record(category, started)
+
+    def before_navigation(self):
+        """Sleep only what is left of the minimum interval since the previous navigation."""
+        started = time.perf_counter()
+        if self._last_navigation is not None:
+            target = self.min_interval + random.uniform(0, self.jitter)
+            remaining = target - (time.monotonic() - self._last_navigation)
+            if remaining > 0:
+                time.sleep(remaining)
+        self._last_navigation = time.monotonic()
+        self._record("politeness", started)
+
+    def wait_until(self, driver, condition, timeout=None, category="ready"):
+        """
+        Wait for a WebDriver condition (e.g. an expected_conditions object).
+
+        Returns:
+            The condition's truthy result, or None on timeout.
+        """
+        started = time.perf_counter()
+        try:
+            return WebDriverWait(driver, timeout or self.timeout, poll_frequency=0.2).until(condition)
+        except Exception:
+            return None
+        finally:
+            self._record(category, started)
+
+    def wait_for_dom_ready(self, driver, timeout=None):
+        return self.wait_until(
+            driver,
+            lambda d: d.execute_script("return document.readyState") == "complete",
+            timeout,
+            category="dom_ready"
+        )
+
+    def wait_for_network_idle(self, driver, idle_ms=500, timeout=None):
+        """Wait until no new resources have been fetched for `idle_ms`."""
+        return self.wait_until(
+            driver,
+            lambda d: d.execute_script(NETWORK_IDLE_JS, idle_ms),
+            timeout,
+            category="network_idle"
+        )
+
+    def report(self, label="run"):
+        """Print and return how long this run spent waiting, per category."""
+        total = sum(self.waited.values())
+        elapsed = time.perf_counter() - self.run_started
+        summary = {
+            'elapsed': round(elapsed, 2),
+            'waited': round(total, 2),
+            'by_category': {k: round(v, 2) for k, v in self.waited.items()},
+            'counts': dict(self.counts)
+        }
+        print(f"⏱️ Pacing for {label}: waited {total:.1f}s of {elapsed:.1f}s "
+              + ", ".join(f"{k}={v:.1f}s/{self.counts[k]}" for k, v in sorted(self.waited.items())))
+        return summary
+
+PACER = Pacer()
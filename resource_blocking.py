@@ -0,0 +1,124 @@
+import os
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Third-party analytics / ad / session-replay hosts the scraper never needs
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googleadservices.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*segment.io*",
+    "*segment.com/analytics*",
+    "*bing.com/bat*",
+    "*linkedin.com/px*",
+    "*ads.linkedin.com*",
+    "*snap.licdn.com*",
+    "*fullstory.com*",
+    "*optimizely.com*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+    "*sentry.io*",
+    "*clarity.ms*",
+]
+
+def _upwork_patterns(extensions):
+    # Scoped to Upwork's own hosts: the Cloudflare challenge
+    # (challenges.cloudflare.com) must keep loading everything it asks for.
+    return [f"*upwork*{ext}*" for ext in extensions]
+
+MEDIA_PATTERNS = _upwork_patterns((".mp4", ".webm", ".mp3", ".m4a", ".ogg"))
+
+FONT_PATTERNS = _upwork_patterns((".woff2", ".woff", ".ttf", ".otf", ".eot"))
+
+IMAGE_PATTERNS = _upwork_patterns((".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico"))
+
+BLOCKING_PROFILES = {
+    'off': [],
+    'trackers': TRACKER_PATTERNS,
+    'standard': TRACKER_PATTERNS + MEDIA_PATTERNS + FONT_PATTERNS + IMAGE_PATTERNS,
+}
+
+# Rough average transfer size per blocked resource type, for the savings estimate
+AVERAGE_RESOURCE_BYTES = {
+    'Image': 25_000,
+    'Font': 40_000,
+    'Media': 500_000,
+    'Script': 60_000,
+    'XHR': 2_000,
+    'Fetch': 2_000,
+    'Other': 5_000,
+}
+
+def blocking_profile():
+    """Active profile name from BLOCK_RESOURCES ('off', 'trackers' or 'standard'; 'off' when unset)."""
+    profile = os.getenv('BLOCK_RESOURCES', 'off').lower()
+    if profile not in BLOCKING_PROFILES:
+        raise ValueError(f"Unknown BLOCK_RESOURCES profile: {profile}")
+    return profile
+
+def configure_blocking_options(options, profile=None):
+    """
+    Add Chrome prefs for the profile to ChromeOptions. Prefs only turn off
+    things Chrome would otherwise prompt for or autoplay; images stay on
+    globally so the Cloudflare checkbox renders exactly as before.
+    """
+    profile = profile or blocking_profile()
+    if profile == 'off':
+        return options
+    options.add_experimental_option('prefs', {
+        'profile.default_content_setting_values.notifications': 2,
+        'profile.default_content_setting_values.geolocation': 2,
+        'profile.default_content_setting_values.media_stream': 2,
+        'profile.default_content_setting_values.automatic_downloads': 2,
+    })
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    return options
+
+def apply_url_blocking(driver, profile=None):
+    """Block the profile's URL patterns for every later request via CDP."""
+    profile = profile or blocking_profile()
+    patterns = BLOCKING_PROFILES[profile]
+    if not patterns:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    print(f" 🚫 Resource blocking '{profile}': {len(patterns)} URL patterns")
+
+def blocking_report(messages):
+    """
+    Summarise blocked vs loaded requests from performance-log messages.
+
+    Bytes saved is an estimate (blocked requests are never downloaded), using
+    AVERAGE_RESOURCE_BYTES per resource type.
+
+    Returns:
+        dict: requests_blocked, blocked_by_type, requests_loaded, bytes_loaded, bytes_saved_estimate
+    """
+    blocked = Counter()
+    loaded = 0
+    bytes_loaded = 0
+    for message in messages:
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.loadingFailed' and params.get('blockedReason'):
+            blocked[params.get('type', 'Other')] += 1
+        elif method == 'Network.loadingFinished':
+            loaded += 1
+            bytes_loaded += int(params.get('encodedDataLength') or 0)
+
+    return {
+        'requests_blocked': sum(blocked.values()),
+        'blocked_by_type': dict(blocked),
+        'requests_loaded': loaded,
+        'bytes_loaded': bytes_loaded,
+        'bytes_saved_estimate': sum(
+            AVERAGE_RESOURCE_BYTES.get(kind, AVERAGE_RESOURCE_BYTES['Other']) * count
+            for kind, count in blocked.items()
+        )
+    }
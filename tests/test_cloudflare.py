@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import pytest
+
+cloudflare = pytest.importorskip('cloudflare')
+Image = pytest.importorskip('PIL.Image')
+
+ROOT = Path(__file__).parent.parent
+SCREENSHOTS = Path(__file__).parent / 'fixtures' / 'cloudflare'
+EXPECTED = json.loads((SCREENSHOTS / 'expected.json').read_text(encoding='utf-8'))
+TEMPLATE = str(ROOT / 'CloudFlare.png')
+
+# Matching at DETECTION_SCALE rounds positions to a couple of pixels
+TOLERANCE = 3
+
+
+def screenshot(name):
+    return Image.open(SCREENSHOTS / name).convert('RGB')
+
+
+def assert_at(location, expected):
+    assert location is not None
+    x, y, w, h = location
+    assert abs(x - expected['x']) <= TOLERANCE and abs(y - expected['y']) <= TOLERANCE
+    assert abs(w - expected['width']) <= TOLERANCE and abs(h - expected['height']) <= TOLERANCE
+
+
+def locate_like_solver(image, rect):
+    # solve_cloudflare_challenge screenshots only the region, then offsets the match
+    region = cloudflare._search_region(rect, *image.size)
+    crop = image.crop((region[0], region[1], region[0] + region[2], region[1] + region[3]))
+    location = cloudflare.locate_template(crop, None, TEMPLATE)
+    if location is None:
+        return None
+    return (region[0] + location[0], region[1] + location[1], location[2], location[3])
+
+
+@pytest.mark.parametrize('name', ['challenge_1280x720.png', 'challenge_1920x1080.png'])
+def test_default_region_finds_checkbox(name):
+    image = screenshot(name)
+
+    assert_at(locate_like_solver(image, None), EXPECTED[name])
+    assert_at(cloudflare.locate_template(image, cloudflare.challenge_region(*image.size), TEMPLATE), EXPECTED[name])
+
+
+def test_widget_rect_region_finds_off_center_checkbox():
+    name = 'challenge_offcenter_1280x720.png'
+    image = screenshot(name)
+
+    # Outside the central default region: only the DOM widget rectangle finds it
+    assert locate_like_solver(image, None) is None
+    assert_at(locate_like_solver(image, tuple(EXPECTED[name]['widget'])), EXPECTED[name])
+
+
+def test_no_checkbox_on_plain_page():
+    image = screenshot('no_challenge_1280x720.png')
+
+    assert locate_like_solver(image, None) is None
+    assert cloudflare.locate_template(image, None, TEMPLATE) is None
+
+
+def test_search_region_pads_and_clamps_to_screen():
+    padding = cloudflare.REGION_PADDING
+
+    assert cloudflare._search_region((500, 300, 300, 150), 1280, 720) == \
+        (500 - padding, 300 - padding, 300 + 2 * padding, 150 + 2 * padding)
+    assert cloudflare._search_region((10, 650, 300, 150), 1280, 720) == (0, 650 - padding, 10 + 300 + padding, 720 - (650 - padding))
+    assert cloudflare._search_region(None, 1280, 720) == (320, 180, 640, 360)
+
+
+def test_benchmark_over_saved_screenshots():
+    pytest.importorskip('pyscreeze')
+    paths = [str(SCREENSHOTS / name) for name in ('challenge_1280x720.png', 'challenge_1920x1080.png',
+                                                   'no_challenge_1280x720.png')]
+
+    results = cloudflare.benchmark(paths, template_path=TEMPLATE)
+
+    assert results['region']['found'] == 2
+    assert results['full_screen']['found'] == 2
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from job_parsing import (
+    build_job_record,
+    parse_exact_timestamp,
+    parse_html_pages,
+    parse_job_cards_html,
+    parse_posted_time,
+    parse_search_results_html,
+)
+
+pytest.importorskip('lxml')
+
+SNAPSHOT = (Path(__file__).parent / 'fixtures' / 'search_results.html').read_text(encoding='utf-8')
+
+
+def test_parse_job_cards_html():
+    cards = parse_job_cards_html(SNAPSHOT)
+
+    assert [card['title'] for card in cards] == [
+        'Build an ETL pipeline for Postgres',
+        'Scrape product listings into a spreadsheet',
+        'Airflow DAG review',
+    ]
+    first = cards[0]
+    assert first['link'].startswith('https://www.upwork.com/jobs/Build-ETL-pipeline-for-Postgres_~021801234567890123456/')
+    assert first['tags'] == ['Python', 'PostgreSQL', 'ETL']
+    assert first['description'] == 'Move daily CSV drops into Postgres with dbt models.'
+    assert first['spent'] == '$12K+ spent'
+    assert first['payment_verified'] == 'Payment verified'
+    assert first['posted_text'] == '15 minutes ago'
+    assert first['posted_exact'] == '2026-10-17T08:30:00.000Z'
+    assert (first['budget_part1'], first['budget_part2']) == ('Hourly: $25.00 - $45.00', 'Intermediate')
+
+    last = cards[2]
+    assert last['tags'] == []
+    assert last['spent'] is None and last['payment'] is None and last['posted_exact'] is None
+
+
+def test_parse_job_cards_html_without_results():
+    assert parse_job_cards_html('<html><body><p>No jobs found</p></body></html>') == []
+
+
+def test_build_job_record_hourly():
+    job = build_job_record(parse_job_cards_html(SNAPSHOT)[0], 'etl')
+
+    assert job.search_query == 'etl'
+    assert job.job_link == 'https://www.upwork.com/jobs/~021801234567890123456'
+    assert job.tags == 'Python, PostgreSQL, ETL'
+    assert job.budget_type == 'Hourly: Intermediate'
+    assert (job.lower_hourly_rate, job.higher_hourly_rate) == ('$25.00', '$45.00')
+    assert job.fixed_price == 'N/A'
+    assert job.posted_time == parse_exact_timestamp('2026-10-17T08:30:00Z')
+
+
+def test_build_job_record_fixed_price():
+    job = build_job_record(parse_job_cards_html(SNAPSHOT)[1], 'etl')
+
+    assert job.budget_type == 'Fixed price Entry level'
+    assert job.payment_info == 'Est. budget: $150.00'
+    assert job.fixed_price == '$150.00'
+    assert (job.lower_hourly_rate, job.higher_hourly_rate) == ('N/A', 'N/A')
+    assert job.payment_verified == 'Payment unverified'
+
+
+def test_build_job_record_missing_fields():
+    job = build_job_record({'title': None, 'link': None}, 'etl')
+
+    assert (job.title, job.job_link, job.tags, job.budget_type) == ('N/A', 'N/A', '', 'N/A')
+
+
+def test_parse_search_results_html_stops_at_last_scrape_time():
+    # Relative times only, so the cut-off does not depend on today's date
+    html = SNAPSHOT.replace('<time datetime="2026-10-17T08:30:00.000Z"></time>', '')
+    jobs = parse_search_results_html(html, 'etl', last_scrape_time=datetime.now() - timedelta(days=1))
+
+    assert [job.title for job in jobs] == [
+        'Build an ETL pipeline for Postgres',
+        'Scrape product listings into a spreadsheet',
+    ]
+    assert len(parse_search_results_html(SNAPSHOT, 'etl')) == 3
+
+
+def test_parse_html_pages_keeps_page_order():
+    pages = parse_html_pages([SNAPSHOT, '<html></html>', SNAPSHOT], 'etl', workers=2)
+
+    assert [len(page) for page in pages] == [3, 0, 3]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('just now', timedelta(0)),
+    ('moments ago', timedelta(0)),
+    ('30 seconds ago', timedelta(seconds=30)),
+    ('a minute ago', timedelta(minutes=1)),
+    ('15 minutes ago', timedelta(minutes=15)),
+    ('an hour ago', timedelta(hours=1)),
+    ('2 hours ago', timedelta(hours=2)),
+    ('yesterday', timedelta(days=1)),
+    ('3 days ago', timedelta(days=3)),
+    ('last week', timedelta(weeks=1)),
+    ('2 weeks ago', timedelta(weeks=2)),
+    ('last month', timedelta(days=30)),
+    ('2 months ago', timedelta(days=60)),
+    ('a year ago', timedelta(days=365)),
+    ('Posted recently', timedelta(0)),
+])
+def test_parse_posted_time(text, expected):
+    before = datetime.now()
+    parsed = parse_posted_time(f"  {text.upper()} ")
+    after = datetime.now()
+
+    assert before - expected <= parsed <= after - expected
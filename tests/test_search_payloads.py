@@ -0,0 +1,134 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from job_parsing import (
+    build_job_record,
+    canonical_job_link,
+    cards_from_search_payloads,
+    parse_exact_timestamp,
+    parse_job_cards_html,
+)
+
+upwork_scraping = pytest.importorskip('upwork_scraping')
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+RECORDED = json.loads((FIXTURES / 'performance_log.json').read_text(encoding='utf-8'))
+
+
+class RecordedDriver:
+    """Stand-in for the Chrome driver, replaying a recorded performance log and response bodies."""
+
+    def __init__(self, recording):
+        self.log = list(recording['performance_log'])
+        self.bodies = recording['response_bodies']
+        self.body_requests = []
+
+    def get_log(self, log_type):
+        assert log_type == 'performance'
+        entries, self.log = self.log, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == 'Network.getResponseBody'
+        self.body_requests.append(params['requestId'])
+        if params['requestId'] not in self.bodies:
+            raise RuntimeError('No resource with given identifier found')
+        return self.bodies[params['requestId']]
+
+
+@pytest.fixture
+def driver():
+    return RecordedDriver(RECORDED)
+
+
+def test_read_performance_log_skips_malformed_entries(driver):
+    messages = upwork_scraping.read_performance_log(driver)
+
+    assert [m['method'] for m in messages] == ['Network.requestWillBeSent'] + ['Network.responseReceived'] * 5
+    assert upwork_scraping.read_performance_log(driver) == []
+
+
+def test_capture_search_payloads_filters_and_decodes(driver, capsys):
+    payloads = upwork_scraping.capture_search_payloads(driver)
+
+    # Only JSON responses from search API URLs are read; the HTML page and notifications are not
+    assert driver.body_requests == ['1000.1', '1000.4', '1000.5']
+    # Plain and base64-encoded bodies decode to the same payload; the missing body only warns
+    assert len(payloads) == 2 and payloads[0] == payloads[1]
+    assert 'Could not read response body' in capsys.readouterr().out
+
+
+def test_capture_search_payloads_with_read_messages(driver):
+    messages = upwork_scraping.read_performance_log(driver)
+
+    payloads = upwork_scraping.capture_search_payloads(driver, messages=messages[:2])
+
+    assert len(payloads) == 1
+    assert driver.body_requests == ['1000.1']
+
+
+def test_cards_from_captured_payloads(driver):
+    cards = cards_from_search_payloads(upwork_scraping.capture_search_payloads(driver))
+
+    # The same jobs arrive in both captured responses; each is kept once
+    assert [card['job_id'] for card in cards] == ['~021801234567890123456', '~021801234567890123457']
+    hourly, fixed = cards
+    assert hourly['link'] == 'https://www.upwork.com/jobs/~021801234567890123456'
+    assert hourly['tags'] == ['Python', 'PostgreSQL', 'ETL']
+    assert (hourly['budget_part1'], hourly['budget_part2']) == ('Hourly: $25.00 - $45.00', 'Intermediate')
+    assert hourly['spent'] == '$12K+\nspent'
+    assert hourly['payment_verified'] == 'Payment verified'
+    assert (fixed['budget_part1'], fixed['budget_part2']) == ('Fixed price', 'Entry level')
+    assert fixed['payment'] == 'Est. budget: $150.00'
+    assert fixed['payment_verified'] == 'Payment unverified'
+
+
+def test_job_records_from_captured_payloads(driver):
+    payloads = upwork_scraping.capture_search_payloads(driver)
+    hourly, fixed = [build_job_record(card, 'etl') for card in cards_from_search_payloads(payloads)]
+
+    assert hourly.budget_type == 'Hourly: Intermediate'
+    assert (hourly.lower_hourly_rate, hourly.higher_hourly_rate) == ('$25.00', '$45.00')
+    assert hourly.posted_time == parse_exact_timestamp('2026-10-17T08:30:00Z')
+    assert fixed.budget_type == 'Fixed price Entry level'
+    assert fixed.fixed_price == '$150.00'
+    assert fixed.posted_time == datetime.fromtimestamp(1792224000)
+
+
+def test_network_and_dom_records_agree(driver):
+    pytest.importorskip('lxml')
+    html = (FIXTURES / 'search_results.html').read_text(encoding='utf-8')
+    dom = [build_job_record(card, 'etl') for card in parse_job_cards_html(html)]
+    network = [build_job_record(card, 'etl')
+               for card in cards_from_search_payloads(upwork_scraping.capture_search_payloads(driver))]
+
+    for dom_job, network_job in zip(dom, network):
+        assert dom_job.job_link == network_job.job_link
+        assert dom_job.content_hash() == network_job.content_hash()
+
+
+def test_hourly_without_rates_or_level():
+    job = build_job_record({'title': 'Audit', 'budget_part1': 'Hourly: $25.00 - $45.00'}, 'etl')
+
+    assert job.budget_type == 'Hourly'
+
+
+def test_canonical_job_link():
+    dom_link = 'https://www.upwork.com/jobs/Build-ETL-pipeline_~021801234567890123456/?referrer_url_path=/nx/search/jobs/'
+
+    assert canonical_job_link(dom_link) == 'https://www.upwork.com/jobs/~021801234567890123456'
+    assert canonical_job_link('https://www.upwork.com/freelance-jobs/apply/?page=2') == \
+        'https://www.upwork.com/freelance-jobs/apply/'
+
+
+@pytest.mark.parametrize('value', [1792224000, 1792224000000, '1792224000000', 1792224000.5])
+def test_parse_exact_timestamp_epoch(value):
+    assert parse_exact_timestamp(value).replace(microsecond=0) == datetime.fromtimestamp(1792224000)
+
+
+@pytest.mark.parametrize('value', [None, '', True, {'seconds': 1}, 'not a date'])
+def test_parse_exact_timestamp_rejects_other_values(value):
+    assert parse_exact_timestamp(value) is None
@@ -8,12 +8,32 @@ import time
 import random
 import sys
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
-import pyautogui
+import base64
 import os
 from dotenv import load_dotenv
-from database_operation import get_search_queries_from_db, read_last_scrape_time, update_scrape_time
+from database_operation import get_search_queries_from_db, read_last_scrape_time, read_results_fingerprint, get_seen_jobs
+from pacing import PACER
+from virtual_display import ensure_virtual_display
+from cloudflare import solve_cloudflare_challenge
+from resource_blocking import blocking_profile, configure_blocking_options, apply_url_blocking, blocking_report
+from job_parsing import (
+    JOB_CARD_SELECTORS,
+    JOB_RECORD_COLUMNS,
+    CONTENT_HASH_FIELDS,
+    JobRecord,
+    content_hash,
+    parse_posted_time,
+    parse_exact_timestamp,
+    card_posted_time,
+    cards_fingerprint,
+    job_key_from_link,
+    build_job_record,
+    jobs_to_columns,
+    parse_job_cards_html,
+    cards_from_search_payloads
+)
 import json
 
 load_dotenv()
@@ -22,12 +42,62 @@ sys.stdout.reconfigure(encoding='utf-8')
 import pandas as pd
 import json
 
+# Typed columns added by normalize_money_columns, with their dtypes
+TYPED_MONEY_COLUMNS = {
+    'Lower Hourly Rate USD': 'Float64',
+    'Higher Hourly Rate USD': 'Float64',
+    'Fixed Price USD': 'Float64',
+    'Client Spent USD': 'Float64',
+    'Payment Verified': 'boolean',
+}
+
+_MONEY_PATTERN = r'\$\s*(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?P<suffix>[KkMm])?'
+_MONEY_MULTIPLIERS = {'K': 1_000, 'M': 1_000_000}
+
+def _money_to_number(series):
+    """Vectorized "$1,250.50" / "$60K+ spent" -> 1250.5 / 60000.0 (NA when there is no amount)."""
+    parts = series.astype('string').str.extract(_MONEY_PATTERN)
+    amount = pd.to_numeric(parts['amount'].str.replace(',', '', regex=False), errors='coerce')
+    multiplier = parts['suffix'].str.upper().map(_MONEY_MULTIPLIERS).fillna(1)
+    return (amount * multiplier).astype('Float64')
+
+def normalize_money_columns(df):
+    """
+    Add typed columns parsed from the display strings, column-wise:
+
+        Lower/Higher Hourly Rate USD  "$20.00"           -> 20.0
+        Fixed Price USD               Payment Info of fixed-price jobs, "$1,500" -> 1500.0
+        Client Spent USD              "$60K+\nspent"     -> 60000.0 (lower bound of the bucket)
+        Payment Verified              "Payment verified" -> True, "... unverified" -> False
+
+    Missing or unparsable values become <NA>. The display columns are kept.
+    """
+    rows = len(df)
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(['N/A'] * rows, index=df.index)
+
+    df['Lower Hourly Rate USD'] = _money_to_number(column('Lower Hourly Rate'))
+    df['Higher Hourly Rate USD'] = _money_to_number(column('Higher Hourly Rate'))
+
+    # Read from Payment Info so amounts with thousands separators keep every digit
+    is_fixed = column('Budget Type').astype('string').str.contains('Fixed price', case=False, na=False)
+    df['Fixed Price USD'] = _money_to_number(column('Payment Info').where(is_fixed, 'N/A'))
+
+    df['Client Spent USD'] = _money_to_number(column('Client Spent'))
+
+    verified = column('Payment Verified/Unverified').astype('string').str.lower()
+    df['Payment Verified'] = pd.Series(pd.NA, index=df.index, dtype='boolean')
+    df.loc[verified.str.contains('verified', na=False), 'Payment Verified'] = True
+    df.loc[verified.str.contains('unverified', na=False), 'Payment Verified'] = False
+    return df
+
 def json_to_dataframe(json_data):
     """
-    Convert JSON data to a clean pandas DataFrame
+    Convert job data to a clean pandas DataFrame
     
     Args:
-        json_data (str or list): JSON string or list of dictionaries
+        json_data (str or list): JobRecords, a JSON string or a list of dictionaries
         
     Returns:
         pd.DataFrame: Clean pandas DataFrame with job data
@@ -38,8 +108,11 @@ def json_to_dataframe(json_data):
     else:
         data = json_data
     
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    # Create DataFrame (JobRecords are handed over column by column, no JSON round-trip)
+    if data and isinstance(data[0], JobRecord):
+        df = pd.DataFrame(jobs_to_columns(data))
+    else:
+        df = pd.DataFrame(data)
     
     # If DataFrame is empty, return empty DataFrame with expected columns
     if df.empty:
@@ -48,7 +121,7 @@ def json_to_dataframe(json_data):
             'Payment Info', 'Budget Type', 'Lower Hourly Rate', 
             'Higher Hourly Rate', 'Fixed Price', 'Payment Verified/Unverified',
             'Description', 'Posted Time'
-        ]
+        ] + list(TYPED_MONEY_COLUMNS) + ['Content Hash']
         return pd.DataFrame(columns=expected_columns)
     
     # Clean the data
@@ -58,6 +131,16 @@ def json_to_dataframe(json_data):
     if 'Posted Time' in df.columns:
         df['Posted Time'] = pd.to_datetime(df['Posted Time'], errors='coerce')
     
+    # Typed numeric / boolean copies of the display strings
+    df = normalize_money_columns(df)
+
+    # Hash of the fields a client can edit, compared with published.lead to catch edits
+    fields = df.reindex(columns=[JOB_RECORD_COLUMNS[name] for name in CONTENT_HASH_FIELDS], fill_value='N/A')
+    df['Content Hash'] = [
+        content_hash(dict(zip(CONTENT_HASH_FIELDS, values)))
+        for values in fields.itertuples(index=False, name=None)
+    ]
+
     # Remove any duplicate rows based on Job Link
     if 'Job Link' in df.columns:
         df = df.drop_duplicates(subset=['Job Link'], keep='first')
@@ -68,104 +151,33 @@ def json_to_dataframe(json_data):
     return df
 
 def human_sleep(min_s=2, max_s=5):
-    time.sleep(random.uniform(min_s, max_s))
+    # Scaled by the pacing budget and counted in the run's wait report
+    PACER.pause(min_s, max_s)
 
 def slow_scroll(driver, pause_time=1):
     last_height = driver.execute_script("return document.body.scrollHeight")
     for _ in range(3):
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        human_sleep(pause_time, pause_time + 2)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
+        # Stop as soon as the page grows, or give up when nothing more loads
+        grown = PACER.wait_until(
+            driver,
+            lambda d: d.execute_script("return document.body.scrollHeight") > last_height,
+            timeout=pause_time + 2,
+            category="scroll"
+        )
+        if not grown:
             break
-        last_height = new_height
+        last_height = driver.execute_script("return document.body.scrollHeight")
 
 def simulate_typing(element, text):
     for char in text:
         element.send_keys(char)
         time.sleep(random.uniform(0.05, 0.15))
 
-def parse_posted_time(text):
-    now = datetime.now()
-    text = text.lower()
-    if 'minute' in text:
-        return now - timedelta(minutes=int(re.search(r'\d+', text).group()))
-    elif 'hour' in text:
-        return now - timedelta(hours=int(re.search(r'\d+', text).group()))
-    elif 'day' in text:
-        return now - timedelta(days=int(re.search(r'\d+', text).group()))
-    return now
-
-def click_cloudflare_checkbox_pyautogui():
-    time.sleep(5.5)
-    pyautogui.click(799, 495)
-    time.sleep(5)
-
-# def wait_until_found_and_click(image_name, confidence=0.9):
-#     time.sleep(8)
-#     count = 0
-#     #print(f" Waiting for '{image_name}'...")
-#     while True:
-#         count += 1
-#         try:
-#             location = pyautogui.locateOnScreen(image_name, confidence=confidence)
-#             if location:
-#                 pyautogui.moveTo(pyautogui.center(location), duration=0.5)
-#                 pyautogui.click()
-#                 print(f" Clicked: {image_name}")
-#                 return
-#         except Exception as e:
-#             if count > 5:
-#                 break
-#             #print(f" Error locating {image_name}: {e}")
-#         time.sleep(2)
-
-
-import pyautogui
-import time
-
-def wait_until_found_and_click(image_name, confidence=0.9, max_clicks=2, max_retries=20):
-    """
-    Tries to find and click the given image on the screen.
-    Will click up to `max_clicks` times in case the image appears multiple times (e.g., Cloudflare checkboxes).
-    Will retry up to `max_retries` times total.
-    Silently skips if image never appears — no exception raised.
-    """
-    time.sleep(5)
-    clicks_done = 0
-    retries = 0
-
-    while retries < max_retries and clicks_done < max_clicks:
-        try:
-            location = pyautogui.locateOnScreen(image_name, confidence=confidence)
-            if location:
-                pyautogui.moveTo(pyautogui.center(location), duration=0.5)
-                pyautogui.click()
-                clicks_done += 1
-                print(f" ✅ Clicked {clicks_done}/{max_clicks} -> {image_name}")
-                time.sleep(3)  # wait for Cloudflare to reload if necessary
-            else:
-                if clicks_done > 0:
-                    print(" ✅ Image disappeared after clicks. Moving on.")
-                    break
-        except Exception as e:
-            print(f" ⚠️ Error during locate/click: {e}")
-        
-        retries += 1
-        time.sleep(2)
-
-    if clicks_done == 0:
-        print(f" ⚠️ Image never appeared: {image_name}")
-    elif clicks_done >= max_clicks:
-        print(" ✅ Reached maximum allowed clicks. Continuing...")
-
-
-
-
-
 def login_with_google(driver, email, password):
+    PACER.before_navigation()
     driver.get("https://www.upwork.com/ab/account-security/login")
-    human_sleep(3, 5)
+    PACER.wait_for_dom_ready(driver)
     try:
         google_btn = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "#login_google_submit > span"))
@@ -173,7 +185,8 @@ def login_with_google(driver, email, password):
         google_btn.click()
     except:
         return
-    human_sleep(4, 6)
+    # Google opens its sign-in popup
+    PACER.wait_until(driver, lambda d: len(d.window_handles) > 1, timeout=10, category="login")
     driver.switch_to.window(driver.window_handles[-1])
     try:
         email_input = WebDriverWait(driver, 15).until(
@@ -183,7 +196,7 @@ def login_with_google(driver, email, password):
         email_input.send_keys(Keys.ENTER)
     except:
         return
-    human_sleep(4, 6)
+    human_sleep(1, 2)
     try:
         password_input = WebDriverWait(driver, 15).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, 'input[type="password"]'))
@@ -192,143 +205,229 @@ def login_with_google(driver, email, password):
         password_input.send_keys(Keys.ENTER)
     except:
         return
-    human_sleep(8, 12)
+    # The popup closes once Google hands the session back to Upwork
+    PACER.wait_until(driver, lambda d: len(d.window_handles) == 1, timeout=30, category="login")
     driver.switch_to.window(driver.window_handles[0])
-
-def extract_jobs_from_current_page(driver, last_scrape_time, search_query):
-    jobs_data = []
-    print("🔍 Looking for job section...")
-    
-    try:
-        job_section = WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "section > article"))
-        ).find_element(By.XPATH, "./..")
-        print("✅ Found job section!")
-    except:
-        print("❌ Could not find job section - page might not have loaded properly")
-        return jobs_data
-    
-    human_sleep(2, 4)
-    job_cards = job_section.find_elements(By.XPATH, './article')
-    print(f"📋 Found {len(job_cards)} job cards on this page")
-    
-    if len(job_cards) == 0:
-        print("❌ No job cards found - this is the problem!")
-        return jobs_data
-    
-    for i, job in enumerate(job_cards):
-        print(f"📝 Processing job {i+1}/{len(job_cards)}...")
-        
-        try:
-            title_elem = job.find_element(By.CSS_SELECTOR, 'h2.job-tile-title a')
-            title = title_elem.text.strip()
-            job_link = title_elem.get_attribute("href")
-            print(f"   Title: {title[:50]}...")
-        except:
-            title, job_link = "N/A", "N/A"
-            print("   ⚠️ Could not extract title")
-            
-        try:
-            tags_elements = job.find_elements(By.CSS_SELECTOR, 'div.air3-token-container button')
-            tags = ', '.join([tag.text.strip() for tag in tags_elements if tag.text.strip() != ''])
-        except:
-            tags = "N/A"
-            
-        try:
-            spent = job.find_element(By.CSS_SELECTOR, 'ul.d-flex.align-items-center.flex-wrap.text-light.gap-wide.text-base-sm.mb-4 li:nth-child(3) > div').text.strip()
-        except:
-            spent = "N/A"
-            
+    PACER.wait_for_dom_ready(driver)
+
+# Collects every field of every job card in one WebDriver round-trip.
+# arguments[0] is JOB_CARD_SELECTORS; missing fields come back as null.
+# arguments[1] lists Upwork job ids already captured: those cards skip the
+# client fields and return only what content_hash covers (title, tags,
+# description, budget, payment) plus the posted time, flagged with seen: true.
+EXTRACT_JOB_CARDS_JS = """
+const sel = arguments[0];
+const seen = new Set(arguments[1] || []);
+const first = document.querySelector('section > article');
+if (!first) { return []; }
+const text = (root, css) => {
+    const el = root.querySelector(css);
+    return el ? el.innerText.trim() : null;
+};
+return Array.from(first.parentElement.children)
+    .filter(el => el.tagName === 'ARTICLE')
+    .map(card => {
+        const link = card.querySelector(sel.title);
+        const key = link ? (link.href.match(/~0[0-9a-z]+/i) || [null])[0] : null;
+        const fields = {
+            title: link ? link.innerText.trim() : null,
+            link: link ? link.href : null,
+            tags: Array.from(card.querySelectorAll(sel.tags))
+                .map(tag => tag.innerText.trim())
+                .filter(tag => tag !== ''),
+            seen: !!key && seen.has(key.toLowerCase())
+        };
+        const names = ['payment', 'description', 'posted_text', 'budget_part1', 'budget_part2'];
+        if (!fields.seen) {
+            names.push('spent', 'payment_verified');
+        }
+        for (const name of names) {
+            fields[name] = text(card, sel[name]);
+        }
+        const exact = card.querySelector(sel.posted_exact);
+        fields.posted_exact = exact ? (exact.getAttribute('datetime') || exact.getAttribute('title')) : null;
+        return fields;
+    });
+"""
+
+# Reads only the link and posted time of the first `arguments[1]` cards
+TOP_CARDS_JS = """
+const sel = arguments[0];
+const first = document.querySelector('section > article');
+if (!first) { return []; }
+return Array.from(first.parentElement.children)
+    .filter(el => el.tagName === 'ARTICLE')
+    .slice(0, arguments[1])
+    .map(card => {
+        const link = card.querySelector(sel.title);
+        const posted = card.querySelector(sel.posted_text);
+        const exact = card.querySelector(sel.posted_exact);
+        return {
+            link: link ? link.href : null,
+            posted_text: posted ? posted.innerText.trim() : null,
+            posted_exact: exact ? (exact.getAttribute('datetime') || exact.getAttribute('title')) : null
+        };
+    });
+"""
+
+# Cards compared by the "nothing new" check before a full extraction (0 disables it)
+EARLY_EXIT_CARDS = int(os.getenv('EARLY_EXIT_CARDS', 5))
+
+# Upper bound on result pages walked per query in one run
+MAX_SEARCH_PAGES = int(os.getenv('MAX_SEARCH_PAGES', 10))
+
+# 'js' extracts cards in the browser, 'html' parses driver.page_source with lxml,
+# 'network' builds them from the search API responses captured over CDP
+EXTRACTION_ENGINE = os.getenv('EXTRACTION_ENGINE', 'js')
+
+# Search result pages are loaded from here (point it at a local stand-in to test)
+SEARCH_BASE_URL = os.getenv('UPWORK_SEARCH_BASE_URL', 'https://www.upwork.com').rstrip('/')
+
+# Response URLs treated as search API payloads in 'network' mode
+SEARCH_API_PATTERN = re.compile(os.getenv('SEARCH_API_PATTERN', r'/api/graphql|/search/jobs'), re.IGNORECASE)
+
+def performance_log_enabled():
+    return EXTRACTION_ENGINE == 'network' or blocking_profile() != 'off'
+
+def read_performance_log(driver):
+    """Drain Chrome's performance log and return the DevTools messages since the last call."""
+    messages = []
+    for entry in driver.get_log('performance'):
         try:
-            payment = job.find_element(By.CSS_SELECTOR, 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(3)').text.strip()
-        except:
-            payment = "N/A"
-            
-        try:
-            payment_verified = job.find_element(By.CSS_SELECTOR, 'ul.d-flex.align-items-center.flex-wrap.text-light.gap-wide.text-base-sm.mb-4 li:nth-child(1) > div').text.strip()
-        except:
-            payment_verified = "N/A"
-            
-        try:
-            description = job.find_element(By.CSS_SELECTOR, 'p.mb-0.text-body-sm').text.strip()
-        except:
-            description = "N/A"
-            
-        try:
-            posted_text = job.find_element(By.CSS_SELECTOR, 'div.job-tile-header small > span:nth-child(2)').text.strip()
-            posted_time = parse_posted_time(posted_text)
-        except:
-            posted_text = "N/A"
-            posted_time = datetime.now()
+            messages.append(json.loads(entry['message'])['message'])
+        except (KeyError, ValueError):
+            continue
+    return messages
+
+def capture_search_payloads(driver, messages=None, url_pattern=SEARCH_API_PATTERN):
+    """
+    Read the JSON bodies of search API responses seen since the last call.
+
+    Uses Chrome's performance log (Network.responseReceived events, enabled
+    in create_driver for 'network' mode) and CDP Network.getResponseBody.
+
+    Args:
+        messages: already-read performance log messages (read here when None)
+
+    Returns:
+        list: decoded JSON payloads
+    """
+    payloads = []
+    if messages is None:
+        messages = read_performance_log(driver)
+    for message in messages:
+        if message.get('method') != 'Network.responseReceived':
+            continue
+
+        response = message['params']['response']
+        if not url_pattern.search(response.get('url', '')) or 'json' not in response.get('mimeType', ''):
+            continue
 
-        # Extract Budget Type from two different selectors
-        budget_parts = []
         try:
-            budget_part1 = job.find_element(By.CSS_SELECTOR, 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(1) > strong').text.strip()
-            if budget_part1:
-                budget_parts.append(budget_part1)
-        except:
-            pass
-        
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': message['params']['requestId']})
+            text = body['body']
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode('utf-8')
+            payloads.append(json.loads(text))
+        except Exception as e:
+            print(f" ⚠️ Could not read response body for {response.get('url')}: {e}")
+    return payloads
+
+def extract_page(driver, last_scrape_time, search_query):
+    """
+    Extract the job cards of the current results page that are newer than
+    `last_scrape_time`.
+
+    Results are sorted by recency, so extraction stops at the first card at
+    or before the watermark. Cards whose Upwork job id is already in the
+    seen-job index (captured under another query) are not returned; their
+    association with `search_query` is queued instead, along with the card
+    itself when its content hash shows the posting was edited.
+
+    Returns:
+        tuple: (list of JobRecords, True if the watermark was reached)
+    """
+    jobs_data = []
+    job_cards = None
+    messages = None
+    seen_jobs = get_seen_jobs()
+    started = time.perf_counter()
+
+    if EXTRACTION_ENGINE == 'network':
+        # Job records straight from the search API responses, no rendering needed
+        PACER.wait_for_network_idle(driver, timeout=10)
+        messages = read_performance_log(driver)
+        payloads = capture_search_payloads(driver, messages)
+        if payloads:
+            print(f"📡 Captured {len(payloads)} search payload(s)")
+            job_cards = cards_from_search_payloads(payloads)
+        else:
+            print("⚠️ No search payloads captured, falling back to the page DOM")
+
+    if job_cards is None:
+        print("🔍 Looking for job section...")
+
         try:
-            budget_part2 = job.find_element(By.CSS_SELECTOR, 'ul.job-tile-info-list.text-base-sm.mb-4 li:nth-child(2) > strong').text.strip()
-            if budget_part2:
-                budget_parts.append(budget_part2)
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "section > article"))
+            )
+            print("✅ Found job section!")
         except:
-            pass
-        
-        budget_raw = ' '.join(budget_parts) if budget_parts else "N/A"
-        
-        # Parse Budget Type and extract hourly rates
-        lower_hourly_rate = "N/A"
-        higher_hourly_rate = "N/A"
-        fixed_price = "N/A"
-        budget_type = budget_raw
-        
-        if budget_raw != "N/A":
-            rate_pattern = r'\$(\d+\.?\d*)\s*-\s*\$(\d+\.?\d*)'
-            rate_match = re.search(rate_pattern, budget_raw)
-            
-            if rate_match:
-                lower_hourly_rate = f"${rate_match.group(1)}"
-                higher_hourly_rate = f"${rate_match.group(2)}"
-                budget_type = re.sub(rate_pattern, '', budget_raw).strip()
-                budget_type = ' '.join(budget_type.split())
-        
-        if "Fixed price" in budget_type and payment != "N/A":
-            price_pattern = r'\$(\d+(?:\.\d{2})?)'
-            price_match = re.search(price_pattern, payment)
-            if price_match:
-                fixed_price = f"${price_match.group(1)}"
-
-        # 🚫 DISABLED TIME FILTERING FOR TESTING - This was probably blocking all jobs!
-        # if last_scrape_time and posted_time <= last_scrape_time:
-        #     print(f"   ⏰ Skipping job due to time filter")
-        #     continue
-
-        jobs_data.append({
-            'Search Query': search_query,
-            'Title': title,
-            'Job Link': job_link,
-            'Tags': tags,
-            'Client Spent': spent,
-            'Payment Info': payment,
-            'Budget Type': budget_type,
-            'Lower Hourly Rate': lower_hourly_rate,
-            'Higher Hourly Rate': higher_hourly_rate,
-            'Fixed Price': fixed_price,
-            'Payment Verified/Unverified': payment_verified,
-            'Description': description,
-            'Posted Time': posted_time.strftime('%Y-%m-%d %H:%M:%S')
-        })
-        
-        print(f" Added job successfully!")
-        human_sleep(1, 2)
-    
-    print(f"Collected {len(jobs_data)} jobs from this page")
-    return jobs_data
+            print("❌ Could not find job section - page might not have loaded properly")
+            return jobs_data, True
+
+        PACER.wait_for_network_idle(driver, timeout=5)
+
+        started = time.perf_counter()
+        if EXTRACTION_ENGINE == 'html':
+            # One page_source fetch, parsed in-process with lxml
+            job_cards = parse_job_cards_html(driver.page_source)
+        else:
+            # One execute_script call returns every field of every card
+            job_cards = driver.execute_script(EXTRACT_JOB_CARDS_JS, JOB_CARD_SELECTORS, seen_jobs.snapshot()) or []
+    print(f"📋 Found {len(job_cards)} job cards on this page "
+          f"(extracted in {time.perf_counter() - started:.2f}s)")
+
+    if blocking_profile() != 'off':
+        if messages is None:
+            messages = read_performance_log(driver)
+        report = blocking_report(messages)
+        print(f"🚫 Blocked {report['requests_blocked']} requests {report['blocked_by_type']} "
+              f"(~{report['bytes_saved_estimate'] / 1024:.0f} KB saved), "
+              f"loaded {report['requests_loaded']} ({report['bytes_loaded'] / 1024:.0f} KB)")
 
-def navigate_to_page(driver, page_number, last_scrape_time, all_jobs, search_query):
+    if len(job_cards) == 0:
+        print("❌ No job cards found - this is the problem!")
+        return jobs_data, True
+
+    already_captured = 0
+    for i, card in enumerate(job_cards):
+        if last_scrape_time and card_posted_time(card) <= last_scrape_time:
+            print(f"   ⏰ Job {i+1}/{len(job_cards)} is older than the last scrape ({last_scrape_time}), stopping")
+            print(f"Collected {len(jobs_data)} new jobs from this page ({already_captured} already captured)")
+            return jobs_data, True
+
+        job_key = job_key_from_link(card.get('link'))
+        if card.get('seen') or job_key in seen_jobs:
+            # Already captured: only its new query, and the job itself if its content was edited
+            seen_card = build_job_record(card, search_query)
+            edited = seen_jobs.is_edited(job_key, seen_card.content_hash())
+            seen_jobs.associate(job_key, search_query, card.get('link'), edit=seen_card if edited else None)
+            already_captured += 1
+            continue
+
+        job = build_job_record(card, search_query)
+        print(f"📝 Job {i+1}/{len(job_cards)}: {job.title[:50]}...")
+        jobs_data.append(job)
+
+    print(f"Collected {len(jobs_data)} jobs from this page ({already_captured} already captured)")
+    return jobs_data, False
+
+def extract_jobs_from_current_page(driver, last_scrape_time, search_query):
+    return extract_page(driver, last_scrape_time, search_query)[0]
+
+def go_to_page(driver, page_number):
+    """Click the results pagination button for `page_number`. Returns False if there is none."""
     try:
         # Wait for any pagination button to load
         WebDriverWait(driver, 15).until(
@@ -340,57 +439,317 @@ def navigate_to_page(driver, page_number, last_scrape_time, all_jobs, search_que
             EC.element_to_be_clickable((By.CSS_SELECTOR, f"button[data-ev-page_index='{page_number}']"))
         )
 
+        old_first_card = driver.find_element(By.CSS_SELECTOR, "section > article")
+        PACER.before_navigation()
         page_button.click()
-        human_sleep(5, 8)
+        # The old result cards are replaced once the next page has rendered
+        PACER.wait_until(driver, EC.staleness_of(old_first_card), timeout=15, category="page_change")
+        PACER.wait_for_network_idle(driver, timeout=5)
         slow_scroll(driver)
-        return all_jobs + extract_jobs_from_current_page(driver, last_scrape_time, search_query)
+        return True
     except Exception as e:
-        return all_jobs
+        return False
 
-def scrape_upwork_jobs():
-    all_jobs = []
-    search_queries = get_search_queries_from_db()
-    
-    if not search_queries:
-        return json.dumps([], ensure_ascii=False)
+def check_nothing_new(driver, search_query, last_scrape_time):
+    """
+    Fast path before extraction: read only the top EARLY_EXIT_CARDS cards.
+
+    Nothing is new when their fingerprint matches the one stored by the
+    previous run, or when even the newest card is at or before the watermark.
 
+    Returns:
+        tuple: (True if nothing is new, fingerprint of the top cards or None)
+    """
+    if EARLY_EXIT_CARDS <= 0:
+        return False, None
+    try:
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "section > article"))
+        )
+        top_cards = driver.execute_script(TOP_CARDS_JS, JOB_CARD_SELECTORS, EARLY_EXIT_CARDS) or []
+    except Exception as e:
+        print(f"⚠️ Could not read the top cards ({e}), doing a full extraction")
+        return False, None
+
+    fingerprint = cards_fingerprint(top_cards)
+    if fingerprint is None:
+        return False, None
+    if fingerprint == read_results_fingerprint(search_query):
+        return True, fingerprint
+    if last_scrape_time and card_posted_time(top_cards[0]) <= last_scrape_time:
+        return True, fingerprint
+    return False, fingerprint
+
+def iter_search_pages(driver, search_query, last_scrape_time, max_pages=None):
+    """
+    Walk recency-sorted result pages (starting on the current one) and stop
+    at the first card older than `last_scrape_time`, so each run fetches
+    exactly the jobs posted since the previous one.
+
+    Without a watermark (first run for a query) only the first page is read.
+
+    Yields:
+        list: JobRecords of one results page, newer than the watermark
+    """
+    max_pages = max_pages or MAX_SEARCH_PAGES
+    page_jobs, reached_watermark = extract_page(driver, last_scrape_time, search_query)
+    page_number = 1
+    total = len(page_jobs)
+    yield page_jobs
+
+    if last_scrape_time is None:
+        reached_watermark = True
+
+    while not reached_watermark and page_number < max_pages:
+        page_number += 1
+        print(f"➡️ Moving to results page {page_number}...")
+        if not go_to_page(driver, page_number):
+            print(f"No results page {page_number}, stopping")
+            break
+        page_jobs, reached_watermark = extract_page(driver, last_scrape_time, search_query)
+        total += len(page_jobs)
+        yield page_jobs
+
+    if not reached_watermark:
+        print(f"⚠️ Stopped after {page_number} pages without reaching the last scrape time")
+    print(f"Crawled {page_number} page(s), {total} new jobs for '{search_query}'")
+
+UPWORK_HOME_URL = "https://www.upwork.com/"
+SESSION_PROBE_URL = "https://www.upwork.com/nx/find-work/"
+# Elements only a logged-in page has (the account menu in the top nav)
+SESSION_PROBE_SELECTOR = os.getenv(
+    'SESSION_PROBE_SELECTOR',
+    '[data-cy="menu-avatar"], [data-test="nav-user-avatar"], nav img.nav-avatar, '
+    'button[aria-label*="account" i]'
+)
+
+def create_driver(profile_dir=None):
+    """
+    Start undetected Chrome. With a profile dir (arg or CHROME_PROFILE_DIR)
+    Chrome keeps its cookies/local storage between runs. The BLOCK_RESOURCES
+    profile (see resource_blocking) is applied before the first page load.
+    With VIRTUAL_DISPLAY set, Chrome (and pyautogui) run inside this
+    process's own Xvfb display with a fixed VIRTUAL_DISPLAY_SIZE geometry.
+    """
     options = uc.ChromeOptions()
-    options.add_argument("--start-maximized")
+    virtual_display = ensure_virtual_display()
+    if virtual_display:
+        # No window manager inside Xvfb: pin the window to the whole screen
+        options.add_argument(f"--window-size={virtual_display.width},{virtual_display.height}")
+        options.add_argument("--window-position=0,0")
+    else:
+        options.add_argument("--start-maximized")
+    configure_blocking_options(options)
+    if performance_log_enabled():
+        # Network events land in the performance log for payload capture / blocking stats
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    profile_dir = profile_dir or os.getenv('CHROME_PROFILE_DIR')
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
     driver = uc.Chrome(options=options)
+    apply_url_blocking(driver)
+    return driver
+
+def save_session_cookies(driver, cookie_file):
+    cookies = driver.get_cookies()
+    with open(cookie_file, 'w', encoding='utf-8') as f:
+        json.dump(cookies, f)
+    print(f" 💾 Saved {len(cookies)} session cookies to {cookie_file}")
+
+def load_session_cookies(driver, cookie_file):
+    """Load an exported cookie jar into the driver. Returns False if there is none."""
+    if not cookie_file or not os.path.exists(cookie_file):
+        return False
+    with open(cookie_file, encoding='utf-8') as f:
+        cookies = json.load(f)
+
+    # Cookies can only be set for the domain currently loaded
+    PACER.before_navigation()
+    driver.get(UPWORK_HOME_URL)
+    loaded = 0
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+            loaded += 1
+        except Exception:
+            pass
+    print(f" 🍪 Loaded {loaded}/{len(cookies)} session cookies from {cookie_file}")
+    return loaded > 0
 
+def is_session_valid(driver, timeout=10):
+    """
+    Cheap login probe: open a logged-in-only page and wait for an element
+    only a logged-in page has (SESSION_PROBE_SELECTOR). A redirect to the
+    login form or a Cloudflare interstitial both count as not logged in.
+    """
+    PACER.before_navigation()
+    driver.get(SESSION_PROBE_URL)
+    PACER.wait_for_dom_ready(driver, timeout)
+    if "account-security/login" in driver.current_url:
+        return False
     try:
-        login_with_google(driver, os.getenv('GMAIL_EMAIL'), os.getenv('GMAIL_PASSWORD'))
-        human_sleep(7, 10)
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, SESSION_PROBE_SELECTOR))
+        )
+    except Exception:
+        print(f" ⚠️ Session probe found no logged-in page at {driver.current_url}")
+        return False
+    return True
 
-        query_text = search_queries["search_criteria"]
-        search_url = f"https://www.upwork.com/nx/jobs/search/?q={query_text.replace(' ', '%20')}&sort=recency"
+def start_logged_in_session(profile_dir=None, cookie_file=None):
+    """
+    Start Chrome with a logged-in Upwork session; the driver can then scrape
+    many queries.
 
-        driver.get(search_url)
-        human_sleep(3, 5)
-        wait_until_found_and_click(os.getenv('CLOUDFLARE_IMAGE_PATH'), confidence=0.6)
+    A saved session (Chrome profile dir and/or exported cookie jar, see
+    CHROME_PROFILE_DIR / UPWORK_COOKIE_FILE) is reused when the probe says
+    it is still valid; the full Google login only runs when it has expired.
+    The cookie jar is written only after the probe passes.
+    """
+    profile_dir = profile_dir or os.getenv('CHROME_PROFILE_DIR')
+    cookie_file = cookie_file or os.getenv('UPWORK_COOKIE_FILE')
+
+    driver = create_driver(profile_dir)
+    if cookie_file:
+        load_session_cookies(driver, cookie_file)
+
+    if (profile_dir or cookie_file) and is_session_valid(driver):
+        print(" ✅ Saved Upwork session is still valid, skipping Google login")
+        # Re-export so refreshed session cookies outlive this run
+        if cookie_file:
+            save_session_cookies(driver, cookie_file)
+        return driver
+
+    print(" 🔑 No valid saved session, logging in with Google...")
+    login_with_google(driver, os.getenv('GMAIL_EMAIL'), os.getenv('GMAIL_PASSWORD'))
+    PACER.wait_for_dom_ready(driver)
+
+    # login_with_google returns quietly when a step fails: only a passing
+    # probe makes the cookie jar worth saving
+    if not is_session_valid(driver):
+        print(" ⚠️ Google login did not produce a logged-in session; cookies not saved")
+    elif cookie_file:
+        save_session_cookies(driver, cookie_file)
+    return driver
+
+def scrape_search_query_pages(driver, query_text, state=None):
+    """
+    Scrape one search query with an already logged-in driver, page by page.
 
-        last_scrape_time = read_last_scrape_time(query_text)
-        query_jobs = extract_jobs_from_current_page(driver, last_scrape_time, query_text)
+    When check_nothing_new finds no new jobs, nothing is yielded.
 
-        for page_num in []:
-            query_jobs = navigate_to_page(driver, page_num, last_scrape_time, query_jobs, query_text)
+    The query's last scrape time is not advanced here: the caller stores
+    state["scraped_at"] with update_scrape_time in the transaction that
+    writes the scraped jobs, so a failed write leaves the old mark in place.
 
-        all_jobs.extend(query_jobs)
-        update_scrape_time(query_text)
+    Args:
+        driver: logged-in driver
+        query_text (str): search criteria
+        state (dict): filled with "scraped_at" (taken before the first page
+                      is requested), "unchanged" (nothing new, no pages) and
+                      "fingerprint" (top cards, to store with the scrape time)
+
+    Yields:
+        list: JobRecords of one results page
+    """
+    state = {} if state is None else state
+    PACER.start_run()
+    search_url = f"{SEARCH_BASE_URL}/nx/jobs/search/?q={query_text.replace(' ', '%20')}&sort=recency"
+
+    # Jobs posted while the pages are crawled must stay newer than the next mark
+    state['scraped_at'] = datetime.now()
+    PACER.before_navigation()
+    driver.get(search_url)
+    PACER.wait_for_dom_ready(driver)
+    solve_cloudflare_challenge(driver, confidence=0.6)
+
+    last_scrape_time = read_last_scrape_time(query_text)
+    started = time.perf_counter()
+    state['unchanged'], state['fingerprint'] = check_nothing_new(driver, query_text, last_scrape_time)
+
+    if state['unchanged']:
+        print(f"💤 Nothing new for '{query_text}' (checked top cards in {time.perf_counter() - started:.2f}s)")
+    else:
+        yield from iter_search_pages(driver, query_text, last_scrape_time)
 
-        # Since timestamps are already converted to strings, create DataFrame directly
-        df = pd.DataFrame(all_jobs)
+    PACER.report(query_text)
 
-        if not df.empty:
-            df.to_csv("upwork_jobs.csv", index=False, encoding='utf-8-sig')
+def scrape_search_query(driver, query_text, state=None):
+    """
+    Scrape one search query with an already logged-in driver.
 
-        # Return JSON directly from the list of dictionaries (no DataFrame conversion needed)
-        return json.dumps(all_jobs, ensure_ascii=False, default=str)
+    Returns:
+        list: JobRecords for this query
+    """
+    query_jobs = []
+    for page_jobs in scrape_search_query_pages(driver, query_text, state=state):
+        query_jobs.extend(page_jobs)
+    return query_jobs
+
+def scrape_upwork_jobs(search_queries=None, driver=None, state=None):
+    """
+    Scrape one practice row and return its jobs. The query's last scrape
+    time is not advanced here (see scrape_search_query_pages).
+
+    Args:
+        search_queries (dict): practice row ({"id", "search_criteria"}); read
+                               from the DB when omitted
+        driver: logged-in driver to reuse; when omitted a new session is
+                started and quit afterwards
+        state (dict): see scrape_search_query_pages ("scraped_at", "unchanged", "fingerprint")
+
+    Returns:
+        list: JobRecords (serialise with jobs_to_json only for raw storage)
+    """
+    all_jobs = []
+    if search_queries is None:
+        search_queries = get_search_queries_from_db()
+
+    if not search_queries:
+        return all_jobs
+
+    owns_driver = driver is None
+    if owns_driver:
+        driver = start_logged_in_session()
+
+    try:
+        all_jobs.extend(scrape_search_query(driver, search_queries["search_criteria"], state=state))
+        return all_jobs
 
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        if owns_driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+def stream_upwork_jobs(search_queries, driver=None, state=None):
+    """
+    Scrape one practice row and yield its jobs one results page at a time, so
+    the caller can persist each page while the browser moves on to the next.
 
+    The query's last scrape time is not advanced here: call update_scrape_time
+    once every yielded page has been written.
+
+    Args:
+        search_queries (dict): practice row ({"id", "search_criteria"})
+        driver: logged-in driver to reuse; when omitted a new session is
+                started and quit afterwards
+        state (dict): see scrape_search_query_pages ("scraped_at", "unchanged", "fingerprint")
 
+    Yields:
+        list: JobRecords of one results page
+    """
+    owns_driver = driver is None
+    if owns_driver:
+        driver = start_logged_in_session()
+
+    try:
+        for page_jobs in scrape_search_query_pages(driver, search_queries["search_criteria"], state=state):
+            yield page_jobs
+    finally:
+        if owns_driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
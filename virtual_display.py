@@ -0,0 +1,91 @@
+import atexit
+import os
+import shutil
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_display = None
+
+def virtual_display_enabled():
+    return os.getenv('VIRTUAL_DISPLAY', '0').lower() in ('1', 'true', 'yes')
+
+def display_size():
+    """Screen / window geometry as (width, height), from VIRTUAL_DISPLAY_SIZE (default 1920x1080)."""
+    width, height = os.getenv('VIRTUAL_DISPLAY_SIZE', '1920x1080').lower().split('x')
+    return int(width), int(height)
+
+class VirtualDisplay:
+    """
+    A private Xvfb X server for one scraper process.
+
+    Xvfb picks a free display number itself (-displayfd), so many scrapers
+    can run side by side on one server without a GPU or a physical screen.
+    """
+
+    def __init__(self, width=1920, height=1080, depth=24):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.process = None
+        self.display = None
+        self._previous_display = None
+
+    def start(self):
+        if shutil.which('Xvfb') is None:
+            raise RuntimeError("Xvfb is not installed (apt-get install xvfb)")
+
+        read_fd, write_fd = os.pipe()
+        self.process = subprocess.Popen(
+            ['Xvfb', '-displayfd', str(write_fd), '-screen', '0',
+             f'{self.width}x{self.height}x{self.depth}', '-nolisten', 'tcp'],
+            pass_fds=(write_fd,),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        os.close(write_fd)
+
+        # Xvfb writes the display number once it is ready to accept clients
+        with os.fdopen(read_fd) as pipe:
+            number = pipe.readline().strip()
+        if not number:
+            self.process.kill()
+            raise RuntimeError("Xvfb failed to start")
+
+        self.display = f":{number}"
+        self._previous_display = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = self.display
+        print(f" 🖥️ Started virtual display {self.display} ({self.width}x{self.height})")
+        return self
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+        if self._previous_display is None:
+            os.environ.pop('DISPLAY', None)
+        else:
+            os.environ['DISPLAY'] = self._previous_display
+        print(f" 🖥️ Stopped virtual display {self.display}")
+
+def ensure_virtual_display():
+    """
+    Start this process's virtual display once if VIRTUAL_DISPLAY is set.
+
+    Must run before pyautogui is first imported: pyautogui binds to $DISPLAY
+    at import time. Returns the VirtualDisplay, or None when disabled.
+    """
+    global _display
+    if not virtual_display_enabled():
+        return None
+    if _display is None:
+        width, height = display_size()
+        _display = VirtualDisplay(width, height).start()
+        atexit.register(_display.stop)
+    return _display